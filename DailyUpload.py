@@ -5,8 +5,10 @@ import time
 import random
 import logging
 import datetime
+import threading
+from types import SimpleNamespace
+from concurrent.futures import ThreadPoolExecutor
 
-from easydict import EasyDict
 from sqlalchemy import text
 import schedule
 
@@ -27,12 +29,61 @@ logger = logging.getLogger(__name__)
 logger.setLevel(logging.INFO)
 logger.addHandler(log_handler)
 
+# day_upload 的紀錄同樣寫入 logs/upload.log
+upload.configure_logging()
+
 DB_NAMES = ["TWSE", "TPEX", "TAIFEX", "FAOI", "MGTS"]
 HOST = "tw_stock_database:3306"
 USER = "root"
 PASSWORD = "stock"
 CRAWLERHOST = "tw_stocker_crawler:6738"
 
+# 各資料來源共用同一爬蟲服務，同一時間只進行一次爬取，
+# 與原本逐日依序補抓的負載相同
+CRAWLER_CONCURRENCY = 1
+crawler_semaphore = threading.Semaphore(CRAWLER_CONCURRENCY)
+
+# 對爬蟲服務連續兩次請求的隨機間隔秒數範圍，沿用原本的 3 至 15 秒
+CRAWLER_MIN_INTERVAL = 3
+CRAWLER_MAX_INTERVAL = 15
+
+
+class HostRateLimiter:
+    """限制對同一主機請求頻率的速率限制器。
+
+    每次請求預約下一個可用時間點，兩次請求間隔為隨機秒數。
+    僅等待中的執行緒會休眠，其他執行緒的爬取與上傳不受影響。
+    """
+
+    def __init__(self, min_s, max_s):
+        """初始化速率限制器。
+
+        Args:
+            min_s (float): 請求間隔最小秒數。
+            max_s (float): 請求間隔最大秒數。
+        """
+        self.min_s = min_s
+        self.max_s = max_s
+        self._next = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """等待至可發出下一次請求的時間點。"""
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self._next)
+            self._next = start + random.uniform(self.min_s, self.max_s)
+
+        wait = start - now
+        if wait > 0:
+            time.sleep(wait)
+
+
+# 排程補抓與手動上傳任務共用同一速率限制器，合計請求頻率不超過設定
+crawler_rate_limiter = HostRateLimiter(
+    CRAWLER_MIN_INTERVAL, CRAWLER_MAX_INTERVAL
+)
+
 
 def get_missing_dates(db_name, days=30):
     """查詢過去指定天數內尚未上傳的日期。
@@ -44,20 +95,16 @@ def get_missing_dates(db_name, days=30):
     Returns:
         list[str]: 尚未上傳的日期清單，格式為 YYYY-MM-DD。
     """
-    conn = MySQLRouter(HOST, USER, PASSWORD, db_name).mysql_conn
-
+    today = datetime.date.today()
     date_list = [
-        (datetime.datetime.now() - datetime.timedelta(days=i)).strftime("%Y-%m-%d")
-        for i in range(days)
+        (today - datetime.timedelta(days=i)).isoformat() for i in range(days)
     ]
 
-    uploaded_dates = conn.execute(
-        text(
-            f"SELECT Date FROM UploadDate "
-            f"WHERE Date >= '{date_list[-1]}'"
-        )
-    ).fetchall()
-    conn.close()
+    with MySQLRouter(HOST, USER, PASSWORD, db_name).connection() as conn:
+        uploaded_dates = conn.execute(
+            text("SELECT Date FROM UploadDate WHERE Date >= :start_date"),
+            {"start_date": date_list[-1]},
+        ).fetchall()
 
     uploaded_set = {row[0].strftime("%Y-%m-%d") for row in uploaded_dates}
     missing_dates = [d for d in date_list if d not in uploaded_set]
@@ -65,21 +112,41 @@ def get_missing_dates(db_name, days=30):
     return missing_dates
 
 
+def craw_db(db_name, missing_dates):
+    """依序補抓單一資料來源的缺漏日期。
+
+    每次爬取前經由共用的速率限制器排隊，並取得爬蟲服務的併發名額，
+    避免對爬蟲服務造成負擔。
+
+    Args:
+        db_name (str): 資料庫名稱。
+        missing_dates (list[str]): 尚未上傳的日期清單，格式為 YYYY-MM-DD。
+    """
+    opt = SimpleNamespace(
+        host=HOST,
+        user=USER,
+        password=PASSWORD,
+        dbname=db_name,
+        crawlerhost=CRAWLERHOST,
+    )
+
+    # 手動上傳任務可能在查詢缺漏日期後補上同一日期，因此仍逐日檢查
+    for date in sorted(missing_dates):
+        crawler_rate_limiter.acquire()
+        with crawler_semaphore:
+            upload.day_upload(date, opt)
+
+    logger.info(f"{db_name}: 補抓完成。")
+
+
 def daily_craw():
     """每日排程爬取資料並上傳至 MySQL 資料庫。
 
     檢查過去 30 天內所有資料來源是否有未上傳的日期，
-    若有則依序爬取並上傳。
+    若有則各資料來源平行補抓，同一資料來源內依日期順序上傳。
     """
+    pending = {}
     for db_name in DB_NAMES:
-        opt = EasyDict({
-            "host": HOST,
-            "user": USER,
-            "password": PASSWORD,
-            "dbname": db_name,
-            "crawlerhost": CRAWLERHOST,
-        })
-
         missing_dates = get_missing_dates(db_name, days=30)
 
         if not missing_dates:
@@ -89,13 +156,19 @@ def daily_craw():
         logger.info(
             f"{db_name}: 發現 {len(missing_dates)} 個未上傳日期，開始補抓。"
         )
+        pending[db_name] = missing_dates
 
-        for date in sorted(missing_dates):
-            pause_duration = random.uniform(3, 15)
-            time.sleep(pause_duration)
-            upload.day_upload(date, opt)
+    if not pending:
+        return
+
+    with ThreadPoolExecutor(max_workers=len(pending)) as executor:
+        futures = [
+            executor.submit(craw_db, db_name, missing_dates)
+            for db_name, missing_dates in pending.items()
+        ]
 
-        logger.info(f"{db_name}: 補抓完成。")
+    for future in futures:
+        future.result()
 
 
 if __name__ == "__main__":
@@ -103,6 +176,11 @@ if __name__ == "__main__":
 
     logger.info("每日排程上傳服務已啟動，排程時間 20:07。")
 
+    # 直接休眠至下一次排程時間，避免每秒輪詢
     while True:
         schedule.run_pending()
-        time.sleep(1)
+        idle = schedule.idle_seconds()
+        if idle is None:
+            break
+        if idle > 0:
+            time.sleep(idle)
@@ -1,11 +1,59 @@
 """MySQL 連線函式模組。"""
 
+import functools
+
 from sqlalchemy import create_engine
 
+# 允許 LOAD DATA LOCAL INFILE 批次載入（見 data_upload.base.load_data_insert）
+CONNECT_ARGS = {"local_infile": True}
+
+
+@functools.lru_cache(maxsize=16)
+def _get_engine(host, user, password, db_name=None):
+    """取得 MySQL Engine，相同連線參數共用同一個 Engine 與連線池。
+
+    Args:
+        host (str): MySQL 主機位址。
+        user (str): MySQL 使用者名稱。
+        password (str): MySQL 密碼。
+        db_name (str | None): 資料庫名稱，預設為 None。
+
+    Returns:
+        sqlalchemy.engine.Engine: MySQL Engine 物件。
+    """
+    address = f"mysql+pymysql://{user}:{password}@{host}"
+    if db_name:
+        address = f"{address}/{db_name}"
+    return create_engine(
+        address,
+        connect_args=CONNECT_ARGS,
+        pool_size=5,
+        max_overflow=10,
+        pool_pre_ping=True,
+        pool_recycle=3600,
+    )
+
+
+def mysql_engine(host, user, password, db_name=None):
+    """取得共用連線池的 MySQL Engine。
+
+    Args:
+        host (str): MySQL 主機位址。
+        user (str): MySQL 使用者名稱。
+        password (str): MySQL 密碼。
+        db_name (str | None): 資料庫名稱，預設為 None。
+
+    Returns:
+        sqlalchemy.engine.Engine: MySQL Engine 物件。
+    """
+    return _get_engine(host, user, password, db_name)
+
 
 def mysql_conn(host, user, password):
     """建立不指定資料庫的 MySQL 連線。
 
+    連線取自共用的連線池，呼叫 close() 後歸還連線池。
+
     Args:
         host (str): MySQL 主機位址。
         user (str): MySQL 使用者名稱。
@@ -19,15 +67,14 @@ def mysql_conn(host, user, password):
         >>> conn.execute("SELECT 1")
         >>> conn.close()
     """
-    address = f"mysql+pymysql://{user}:{password}@{host}"
-    engine = create_engine(address)
-    conn = engine.connect()
-    return conn
+    return _get_engine(host, user, password).connect()
 
 
 def mysql_conn_db(host, user, password, db_name):
     """建立指定資料庫的 MySQL 連線。
 
+    連線取自共用的連線池，呼叫 close() 後歸還連線池。
+
     Args:
         host (str): MySQL 主機位址。
         user (str): MySQL 使用者名稱。
@@ -42,7 +89,4 @@ def mysql_conn_db(host, user, password, db_name):
         >>> conn.execute("SELECT 1")
         >>> conn.close()
     """
-    address = f"mysql+pymysql://{user}:{password}@{host}/{db_name}"
-    engine = create_engine(address)
-    conn = engine.connect()
-    return conn
+    return _get_engine(host, user, password, db_name).connect()
@@ -1,15 +1,264 @@
 """資料上傳抽象基類模組。"""
 
 import os
+import re
+import math
+import types
+import typing
 import logging
+import functools
+import tempfile
 import requests
 from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
 
+import orjson
 import pandas as pd
+import pymysql
+from requests.adapters import HTTPAdapter
 from sqlalchemy import text
+from urllib3.util.retry import Retry
 
 logger = logging.getLogger(__name__)
 
+# MySQL prepared statement 的參數上限，用於計算 multi-row INSERT 每批列數
+MAX_INSERT_PARAMS = 65535
+MAX_INSERT_ROWS = 5000
+
+# 爬蟲服務請求逾時秒數
+CRAWLER_TIMEOUT = 60
+
+# 共用 HTTP session，重複使用與爬蟲服務的 keep-alive 連線
+http_session = requests.Session()
+http_session.mount("http://", HTTPAdapter(
+    pool_connections=8,
+    pool_maxsize=16,
+    max_retries=Retry(
+        total=3, backoff_factor=0.5, status_forcelist=[502, 503, 504]
+    ),
+))
+
+# 向量化轉換只接受 Pydantic 同樣接受且解讀一致的字串格式，
+# 其餘格式改以 Pydantic 逐列驗證
+INT_STR_PATTERN = re.compile(r"[+-]?\d{1,18}")
+FLOAT_STR_PATTERN = re.compile(r"[+-]?\d+(\.\d+)?([eE][+-]?\d+)?")
+DATETIME_STR_PATTERN = re.compile(
+    r"\d{4}-\d{2}-\d{2}([T ]\d{2}:\d{2}(:\d{2}(\.\d{1,6})?)?)?"
+)
+
+CHECK_DATE_SQL = text("SELECT 1 FROM UploadDate WHERE Date = :date LIMIT 1")
+INSERT_DATE_SQL = text(
+    "INSERT IGNORE INTO UploadDate (Date, Open) VALUES (:date, :open)"
+)
+
+
+def _format_load_data_value(value):
+    """將單一欄位值轉為 LOAD DATA 可解析的 CSV 欄位。
+
+    NULL 以未加引號的 NULL 表示，其餘值一律以雙引號包覆。
+
+    Args:
+        value: 欄位值。
+
+    Returns:
+        str: CSV 欄位字串。
+    """
+    if value is None or (isinstance(value, float) and math.isnan(value)):
+        return "NULL"
+    if isinstance(value, bool):
+        value = int(value)
+    return '"' + str(value).replace('"', '""') + '"'
+
+
+@functools.lru_cache(maxsize=32)
+def _schema_fields(model):
+    """解析 Pydantic 模型的欄位型別，每個模型只解析一次。
+
+    Args:
+        model (type[BaseModel]): Pydantic 模型類別。
+
+    Returns:
+        tuple[tuple[str, type, bool]]: 各欄位的名稱、基本型別與是否為 Optional。
+    """
+    fields = []
+    for name, field in model.model_fields.items():
+        annotation, optional = field.annotation, False
+        if typing.get_origin(annotation) in (typing.Union, types.UnionType):
+            args = [
+                a for a in typing.get_args(annotation) if a is not type(None)
+            ]
+            annotation, optional = args[0], True
+        fields.append((name, annotation, optional))
+    return tuple(fields)
+
+
+def _all_str_match(series, pattern):
+    """檢查欄位的非缺值是否皆為完全符合格式的字串。
+
+    Args:
+        series (pd.Series): 待檢查的欄位。
+        pattern (re.Pattern | None): 字串格式，None 表示不限格式。
+
+    Returns:
+        bool: 皆符合時回傳 True。
+    """
+    values = series.dropna()
+    if values.empty:
+        return True
+    if pd.api.types.infer_dtype(values, skipna=False) != "string":
+        return False
+    return pattern is None or bool(values.str.fullmatch(pattern).all())
+
+
+def _coerce_series(series, annotation, optional=False):
+    """依欄位型別以向量化方式轉換單一欄位。
+
+    只處理與 Pydantic 結果一致的明確情況：數值型別欄位、完全符合
+    格式的數字或 ISO 日期字串、以及全為字串的文字欄位。缺值保留為
+    缺值；其餘情況（如數字轉文字、布林值、非 ISO 日期或未支援的
+    型別）皆拋出例外，由呼叫端改以 Pydantic 逐列驗證。
+
+    Args:
+        series (pd.Series): 待轉換的欄位。
+        annotation (type): 欄位基本型別（已去除 Optional）。
+        optional (bool): 是否為 Optional 欄位，預設為 False。
+
+    Returns:
+        pd.Series: 轉換後的欄位。
+
+    Raises:
+        TypeError: 欄位內容不屬於可向量化轉換的明確情況。
+        ValueError: 欄位值無法轉換為指定型別。
+    """
+    numeric_dtype = (
+        pd.api.types.is_numeric_dtype(series)
+        and not pd.api.types.is_bool_dtype(series)
+    )
+    if annotation is datetime:
+        if pd.api.types.is_datetime64_dtype(series):
+            return series
+        if _all_str_match(series, DATETIME_STR_PATTERN):
+            return pd.to_datetime(series, format="ISO8601")
+    elif annotation is int:
+        if numeric_dtype or _all_str_match(series, INT_STR_PATTERN):
+            numeric = pd.to_numeric(series)
+            if not (numeric.dropna() % 1 == 0).all():
+                raise ValueError("整數欄位含有非整數值")
+            return numeric.astype("Int64" if optional else "int64")
+    elif annotation is float:
+        if numeric_dtype or _all_str_match(series, FLOAT_STR_PATTERN):
+            return pd.to_numeric(series).astype("float64")
+    elif annotation is str:
+        if _all_str_match(series, None):
+            return series.where(series.notna())
+    raise TypeError(f"欄位 {series.name} 無法向量化轉換為 {annotation}")
+
+
+def _coerce_frame(df, model):
+    """依模型欄位以向量化方式轉換整個 DataFrame。
+
+    必填欄位缺少或含缺值時拋出例外，由呼叫端改以 Pydantic 逐列驗證。
+
+    Args:
+        df (pd.DataFrame): 待轉換的 DataFrame。
+        model (type[BaseModel]): Pydantic 模型類別。
+
+    Returns:
+        pd.DataFrame: 欄位依模型順序排列並轉換型別後的 DataFrame。
+    """
+    columns = {}
+    for name, annotation, optional in _schema_fields(model):
+        if name not in df.columns:
+            if not optional:
+                raise ValueError(f"缺少必填欄位 {name}")
+            columns[name] = None
+            continue
+        if not optional and df[name].isna().any():
+            raise ValueError(f"必填欄位 {name} 含有缺值")
+        columns[name] = _coerce_series(df[name], annotation, optional)
+    return pd.DataFrame(columns, index=df.index)
+
+
+def validate_schema(df, model):
+    """驗證 DataFrame 是否符合 Pydantic 模型並轉換欄位型別。
+
+    依欄位型別向量化轉換，避免逐列建立 Pydantic 物件。任一欄位
+    轉換失敗（如日期格式不一致、數值無法解析或必填欄位缺值）時，
+    改以 Pydantic 逐列驗證，由 Pydantic 決定接受或拒絕，結果與
+    資料列位置無關。
+
+    Args:
+        df (pd.DataFrame): 待驗證的 DataFrame。
+        model (type[BaseModel]): Pydantic 模型類別。
+
+    Returns:
+        pd.DataFrame: 驗證與轉換後的 DataFrame，空的 DataFrame 原樣回傳。
+
+    Raises:
+        pydantic.ValidationError: 任一資料列不符合模型時拋出。
+    """
+    if df.empty:
+        return df
+
+    try:
+        return _coerce_frame(df, model)
+    except (ValueError, TypeError):
+        records = df.astype(object).where(df.notna(), None)
+        return pd.DataFrame([
+            model(**record).model_dump()
+            for record in records.to_dict(orient='records')
+        ], index=df.index)
+
+
+def load_data_insert(table, conn, keys, data_iter):
+    """以 LOAD DATA LOCAL INFILE 批次寫入資料，供 to_sql 的 method 使用。
+
+    將資料寫入暫存 CSV 檔後由 MySQL 一次載入；
+    若伺服器未開啟 local_infile，則改用 multi-row INSERT IGNORE。
+    兩種方式遇到唯一鍵重複的資料列皆略過而不中斷上傳。
+
+    Args:
+        table (pandas.io.sql.SQLTable): 目標資料表。
+        conn (sqlalchemy.engine.Connection): 資料庫連線物件。
+        keys (list[str]): 欄位名稱清單。
+        data_iter (Iterable[tuple]): 資料列迭代器。
+
+    Returns:
+        int: 寫入的資料筆數。
+    """
+    rows = list(data_iter)
+    columns = ", ".join(f"`{key}`" for key in keys)
+
+    with tempfile.NamedTemporaryFile(
+        "w", encoding="utf-8", suffix=".csv"
+    ) as f:
+        for row in rows:
+            f.write(",".join(_format_load_data_value(v) for v in row))
+            f.write("\n")
+        f.flush()
+
+        cursor = conn.connection.driver_connection.cursor()
+        try:
+            cursor.execute(
+                f"LOAD DATA LOCAL INFILE %s INTO TABLE `{table.name}` "
+                "CHARACTER SET utf8mb4 "
+                "FIELDS TERMINATED BY ',' ENCLOSED BY '\"' ESCAPED BY '' "
+                f"LINES TERMINATED BY '\\n' ({columns})",
+                (f.name,),
+            )
+            return cursor.rowcount
+        except pymysql.MySQLError as e:
+            logger.warning("LOAD DATA LOCAL INFILE 失敗，改用 INSERT：%s", e)
+        finally:
+            cursor.close()
+
+    result = conn.execute(
+        table.table.insert().prefix_with("IGNORE"),
+        [dict(zip(keys, row)) for row in rows],
+    )
+    return result.rowcount
+
 
 class DataUploadBase(ABC):
     """資料上傳抽象基類。
@@ -29,15 +278,20 @@ class DataUploadBase(ABC):
         """
         self.name = os.path.basename(type(self).__module__.split('.')[-1])
         self.conn = conn
+        self._stock_codes = None
 
     @abstractmethod
     def preprocess(self, df):
-        """預處理 DataFrame，上傳前進行資料轉換。"""
+        """預處理 DataFrame，上傳前進行資料轉換。
+
+        實作須回傳新的 DataFrame，不可原地修改傳入的 DataFrame。
+        """
         pass
 
     def craw_data(self, date):
         """根據日期從爬蟲服務取得資料。
 
+        回應以 orjson 解析後直接由資料列建立 DataFrame，
         若爬蟲服務回傳異常則回傳空 DataFrame。
 
         Args:
@@ -49,28 +303,30 @@ class DataUploadBase(ABC):
         url = f"{self.url}/{self.name}"
         payload = {"date": date}
         try:
-            response = requests.get(url, params=payload)
+            response = http_session.get(
+                url, params=payload, timeout=CRAWLER_TIMEOUT
+            )
             response.raise_for_status()
-            json_data = response.json()["data"]
-            df = pd.DataFrame(json_data)
+            json_data = orjson.loads(response.content)["data"]
+            df = pd.DataFrame.from_records(json_data or [])
         except (requests.RequestException, KeyError, ValueError) as e:
-            logger.error(f"日期 {date} 爬取失敗：{e}")
+            logger.error("日期 %s 爬取失敗：%s", date, e)
             df = pd.DataFrame()
         return df
 
     def check_schema(self, df):
         """檢查 DataFrame 的 schema 是否符合 UploadType 模型。
 
+        實際驗證與轉換由 validate_schema 處理。
+
         Args:
             df (pd.DataFrame): 待檢查的 DataFrame。
 
         Returns:
-            pd.DataFrame: 經過 schema 驗證與轉換後的 DataFrame。
+            pd.DataFrame: 經過 schema 驗證與轉換後的 DataFrame，
+                空的 DataFrame 原樣回傳。
         """
-        df_dict = df.to_dict(orient='records')
-        df_schema = [self.UploadType(**record).__dict__ for record in df_dict]
-        df = pd.DataFrame(df_schema)
-        return df
+        return validate_schema(df, self.UploadType)
 
     def check_date(self, date):
         """檢查該日期是否已存在於 UploadDate 資料表中。
@@ -81,17 +337,32 @@ class DataUploadBase(ABC):
         Returns:
             bool: 若日期已存在回傳 True，否則回傳 False。
         """
-        if self.conn.execute(
-            text(f"SELECT COUNT(*) FROM UploadDate WHERE Date = '{date}'")
-        ).scalar():
+        if self.conn.execute(CHECK_DATE_SQL, {"date": date}).scalar():
             return True
         return False
 
+    def _existing_stock_codes(self):
+        """取得 StockName 資料表中已存在的股票代碼。
+
+        首次呼叫時查詢資料庫，之後沿用快取。
+
+        Returns:
+            set[str]: 已存在的股票代碼集合。
+        """
+        if self._stock_codes is None:
+            existing = self.conn.execute(
+                text(f"SELECT {self.stock_code_col} FROM StockName")
+            ).fetchall()
+            self._stock_codes = {row[0] for row in existing}
+        return self._stock_codes
+
     def register_stock_names(self, df):
         """檢查並註冊新的股票代碼至 StockName 資料表。
 
         若 stock_code_col 或 stock_name_col 未設定則跳過（如 TAIFEX 無 StockName 表）。
         比對 DataFrame 中的股票代碼與資料庫現有記錄，將新代碼插入 StockName 表。
+        已存在的代碼快取於上傳器中，新增後同步更新快取。
+        此方法不提交交易，由 _store 與當日資料一併提交。
 
         Args:
             df (pd.DataFrame): 包含股票代碼與名稱的 DataFrame。
@@ -99,18 +370,11 @@ class DataUploadBase(ABC):
         if self.stock_code_col is None or self.stock_name_col is None:
             return
 
-        new_stocks = df[[self.stock_code_col, self.stock_name_col]].drop_duplicates(
-            subset=[self.stock_code_col]
-        )
-
-        existing = self.conn.execute(
-            text(f"SELECT {self.stock_code_col} FROM StockName")
-        ).fetchall()
-        existing_codes = {row[0] for row in existing}
-
-        new_stocks = new_stocks[
-            ~new_stocks[self.stock_code_col].isin(existing_codes)
-        ]
+        existing_codes = self._existing_stock_codes()
+        stocks = df[[self.stock_code_col, self.stock_name_col]]
+        new_stocks = stocks[
+            ~stocks[self.stock_code_col].isin(existing_codes)
+        ].drop_duplicates(subset=[self.stock_code_col])
 
         if new_stocks.empty:
             return
@@ -119,45 +383,44 @@ class DataUploadBase(ABC):
             "StockName", self.conn,
             if_exists='append', index=False
         )
-        self.conn.commit()
+        existing_codes.update(new_stocks[self.stock_code_col])
         logger.info(
-            f"新增 {len(new_stocks)} 筆股票代碼至 StockName："
-            f"{new_stocks[self.stock_code_col].tolist()}"
+            "新增 %d 筆股票代碼至 StockName：%s",
+            len(new_stocks), new_stocks[self.stock_code_col].tolist(),
         )
 
     def upload_df(self, df):
         """上傳每日資料至 DailyPrice 資料表。
 
+        以 LOAD DATA LOCAL INFILE 批次寫入（不支援時退回 multi-row
+        INSERT），每批列數依欄位數計算，確保退回 INSERT 時
+        單一語句的參數數量不超過 MySQL 上限。
+        此方法不提交交易，由 _store 與日期記錄一併提交。
+
         Args:
             df (pd.DataFrame): 包含每日資料的 DataFrame。
         """
-        df_copy = self.preprocess(df.copy())
-        df_copy = self.check_schema(df_copy)
-        df_copy.to_sql(
+        df_upload = self.check_schema(self.preprocess(df))
+        rows_per_insert = MAX_INSERT_PARAMS // len(df_upload.columns)
+        chunksize = max(1, min(MAX_INSERT_ROWS, rows_per_insert))
+        df_upload.to_sql(
             "DailyPrice", self.conn,
-            if_exists='append', index=False, chunksize=1000
+            if_exists='append', index=False,
+            chunksize=chunksize, method=load_data_insert
         )
-        self.conn.commit()
 
     def upload_date(self, date, df):
         """上傳日期記錄至 UploadDate 資料表。
 
+        此方法不提交交易，由 _store 與當日資料一併提交。
+
         Args:
             date (str): 日期字串，格式為 YYYY-MM-DD。
             df (pd.DataFrame): 該日期的資料 DataFrame，用於判斷是否為交易日。
         """
-        if df.shape[0] != 0:
-            update = text(
-                f"INSERT INTO UploadDate (Date, Open) VALUES ('{date}', True);"
-            )
-            self.conn.execute(update)
-            self.conn.commit()
-        else:
-            update = text(
-                f"INSERT INTO UploadDate (Date, Open) VALUES ('{date}', False);"
-            )
-            self.conn.execute(update)
-            self.conn.commit()
+        self.conn.execute(
+            INSERT_DATE_SQL, {"date": date, "open": df.shape[0] != 0}
+        )
 
     def upload(self, date):
         """執行上傳流程。
@@ -168,13 +431,56 @@ class DataUploadBase(ABC):
             date (str): 日期字串，格式為 YYYY-MM-DD。
         """
         if self.check_date(date):
-            logger.info(
-                f"日期 {date} 的資料已存在於資料庫中，跳過上傳。"
-            )
+            logger.info("日期 %s 的資料已存在於資料庫中，跳過上傳。", date)
         else:
-            df = self.craw_data(date)
-            if df.shape[0] > 0:
-                self.register_stock_names(df)
-                self.upload_df(df)
-            self.upload_date(date, df)
-            logger.info(f"日期 {date} 的資料已成功上傳至資料庫。")
+            self._store(date, self.craw_data(date))
+
+    def bulk_upload(self, dates, max_workers=4, before_crawl=None):
+        """平行爬取多個日期的資料，並依日期順序逐日寫入資料庫。
+
+        爬取於執行緒池中進行；寫入在呼叫端執行緒以同一連線依序完成，
+        資料庫連線不跨執行緒共用。
+
+        Args:
+            dates (list[str]): 待上傳的日期清單，應已排除已上傳日期。
+            max_workers (int): 同時爬取的執行緒數，預設為 4。
+            before_crawl (Callable[[], None] | None): 每次爬取前於工作
+                執行緒呼叫，可用於限制對爬蟲服務的請求頻率。
+        """
+        def crawl(date):
+            if before_crawl is not None:
+                before_crawl()
+            return self.craw_data(date)
+
+        executor = ThreadPoolExecutor(max_workers=max_workers)
+        try:
+            for date, df in zip(dates, executor.map(crawl, dates)):
+                self._store(date, df)
+        finally:
+            executor.shutdown(cancel_futures=True)
+
+    def _store(self, date, df):
+        """寫入單日資料與日期記錄。
+
+        新股票代碼、當日資料與日期記錄在同一交易中寫入，任一步驟失敗
+        即整批回滾，避免留下沒有日期記錄的資料而在下次重複寫入。
+
+        Args:
+            date (str): 日期字串，格式為 YYYY-MM-DD。
+            df (pd.DataFrame): 該日期爬取到的資料。
+        """
+        # 先結束先前查詢自動開啟的交易，確保以下寫入都在新開啟的交易中，
+        # pandas to_sql 偵測到進行中的交易時會加入而不自行提交
+        if self.conn.in_transaction():
+            self.conn.commit()
+        try:
+            with self.conn.begin():
+                if df.shape[0] > 0:
+                    self.register_stock_names(df)
+                    self.upload_df(df)
+                self.upload_date(date, df)
+        except Exception:
+            # 回滾的代碼可能已加入快取，下次重新查詢 StockName
+            self._stock_codes = None
+            raise
+        logger.info("日期 %s 的資料已成功上傳至資料庫。", date)
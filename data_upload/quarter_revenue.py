@@ -5,7 +5,9 @@
 使用 Playwright 瀏覽器自動化繞過 MOPS WAF 防護。
 """
 
+import re
 import logging
+import functools
 from datetime import datetime
 from io import StringIO
 from typing import Optional
@@ -15,11 +17,16 @@ from playwright.sync_api import sync_playwright
 from pydantic import BaseModel
 from sqlalchemy import text
 
+from data_upload.base import validate_schema
+
 logger = logging.getLogger(__name__)
 
 # MOPS 頁面 URL（SPA 路由）
 MOPS_PAGE_URL = "https://mops.twse.com.tw/mops/#/web/t163sb19"
 
+# 資料表格必含的欄位名稱，用於略過頁面上的版面與導覽表格
+TABLE_MATCH_KEYWORD = "公司代號"
+
 # 中文欄位模糊對應英文欄位（包含關鍵字即對應）
 # 注意：「營業外收入及支出」須在「營業利益」和「營業收入」之前，
 # 避免「營業」子字串被提早匹配。
@@ -35,6 +42,35 @@ COLUMN_KEYWORD_MAPPING = {
     "稅後淨利": "NetIncome",
 }
 
+# 所有關鍵字合併為單一正規表示式，依上方順序排列
+COLUMN_KEYWORD_PATTERN = re.compile(
+    "|".join(re.escape(k) for k in COLUMN_KEYWORD_MAPPING)
+)
+
+# CompanyCode 須以數字開頭，用於排除合計列與產業別標題列
+COMPANY_CODE_PATTERN = re.compile(r"\d")
+
+# MOPS 表格中代表無資料的符號
+NA_TOKENS = ["--", "－", "―", "—"]
+
+
+@functools.lru_cache(maxsize=64)
+def _match_columns(columns):
+    """根據模糊匹配建立欄位對應，相同欄位組合只計算一次。
+
+    Args:
+        columns (tuple): 原始欄位名稱。
+
+    Returns:
+        dict: 欄位名稱對應字典（原始名稱 → 英文名稱）。
+    """
+    mapping = {}
+    for col in columns:
+        match = COLUMN_KEYWORD_PATTERN.search(str(col))
+        if match:
+            mapping[col] = COLUMN_KEYWORD_MAPPING[match.group(0)]
+    return mapping
+
 
 class QuarterRevenueType(BaseModel):
     """季度營業收入資料 schema。"""
@@ -53,6 +89,30 @@ class QuarterRevenueType(BaseModel):
     NetIncome: Optional[int] = None
 
 
+_REVENUE_COLUMNS = list(QuarterRevenueType.model_fields)
+_REVENUE_KEYS = {"Year", "Season", "CompanyCode"}
+
+UPSERT_REVENUE_SQL = text(
+    f"INSERT INTO QuarterRevenue ({', '.join(_REVENUE_COLUMNS)}) "
+    f"VALUES ({', '.join(':' + c for c in _REVENUE_COLUMNS)}) "
+    "ON DUPLICATE KEY UPDATE "
+    + ", ".join(
+        f"{c} = VALUES({c})"
+        for c in _REVENUE_COLUMNS if c not in _REVENUE_KEYS
+    )
+)
+
+CHECK_UPLOADED_SQL = text(
+    "SELECT COUNT(*) FROM QuarterRevenueUploaded "
+    "WHERE Year = :year AND Season = :season"
+)
+INSERT_UPLOADED_SQL = text(
+    "INSERT INTO QuarterRevenueUploaded "
+    "(Year, Season, UploadedAt, RecordCount) "
+    "VALUES (:year, :season, :uploaded_at, :count)"
+)
+
+
 class QuarterRevenueUploader:
     """季度營業收入爬取與上傳器。"""
 
@@ -156,11 +216,7 @@ class QuarterRevenueUploader:
             bool: 若已上傳回傳 True，否則回傳 False。
         """
         result = self.conn.execute(
-            text(
-                "SELECT COUNT(*) FROM QuarterRevenueUploaded "
-                "WHERE Year = :year AND Season = :season"
-            ),
-            {"year": year, "season": season},
+            CHECK_UPLOADED_SQL, {"year": year, "season": season}
         ).scalar()
         return result > 0
 
@@ -232,7 +288,7 @@ class QuarterRevenueUploader:
 
         try:
             tables = pd.read_html(
-                StringIO(html), flavor="lxml"
+                StringIO(html), flavor="lxml", match=TABLE_MATCH_KEYWORD
             )
         except ValueError:
             logger.warning(
@@ -275,10 +331,10 @@ class QuarterRevenueUploader:
         """
         # 處理多層欄位：將 MultiIndex 合併為單一字串
         if isinstance(df.columns, pd.MultiIndex):
-            df.columns = [
+            df = df.set_axis([
                 " ".join(str(c) for c in col).strip()
                 for col in df.columns
-            ]
+            ], axis=1)
 
         # 建立欄位對應
         column_mapping = self._build_column_mapping(df.columns.tolist())
@@ -302,11 +358,11 @@ class QuarterRevenueUploader:
         # 移除 CompanyCode 非數字開頭的列（合計列、產業別標題列）
         df = df[
             df["CompanyCode"]
-            .str.match(r"^\d")
+            .str.match(COMPANY_CODE_PATTERN)
         ].copy()
 
         # 替換 '--' 為 NaN
-        df = df.replace(["--", "－", "―", "—"], pd.NA)
+        df = df.replace(NA_TOKENS, pd.NA)
 
         # 轉換數值欄位
         numeric_cols = [
@@ -331,23 +387,21 @@ class QuarterRevenueUploader:
     def _build_column_mapping(self, columns):
         """根據模糊匹配建立中文欄位到英文欄位的對應。
 
+        MOPS 各產業別表格的欄位相同，對應結果依欄位組合快取。
+
         Args:
             columns (list[str]): 原始欄位名稱清單。
 
         Returns:
             dict: 欄位名稱對應字典（原始名稱 → 英文名稱）。
         """
-        mapping = {}
-        for col in columns:
-            col_str = str(col)
-            for keyword, eng_name in COLUMN_KEYWORD_MAPPING.items():
-                if keyword in col_str:
-                    mapping[col] = eng_name
-                    break
-        return mapping
+        return dict(_match_columns(tuple(columns)))
 
     def check_schema(self, df):
-        """使用 Pydantic 驗證 DataFrame schema。
+        """驗證 DataFrame schema 並轉換欄位型別。
+
+        驗證與型別轉換由 validate_schema 處理，向量化轉換失敗時
+        改以 Pydantic 逐列驗證。
 
         Args:
             df (pd.DataFrame): 待驗證的 DataFrame。
@@ -355,16 +409,7 @@ class QuarterRevenueUploader:
         Returns:
             pd.DataFrame: 驗證後的 DataFrame。
         """
-        records = df.to_dict(orient="records")
-        for record in records:
-            for key, value in record.items():
-                if pd.isna(value):
-                    record[key] = None
-        validated = [
-            QuarterRevenueType(**record).model_dump()
-            for record in records
-        ]
-        return pd.DataFrame(validated)
+        return validate_schema(df, QuarterRevenueType)
 
     def upload(self, year, season):
         """執行季度營業收入上傳流程。
@@ -397,19 +442,15 @@ class QuarterRevenueUploader:
         df = self.check_schema(df)
         record_count = len(df)
 
-        df.to_sql(
-            "QuarterRevenue", self.conn,
-            if_exists="append", index=False, chunksize=1000,
+        # 以 executemany 批次寫入，重複的資料列由唯一鍵更新
+        records = df.astype(object).where(df.notna(), None)
+        self.conn.execute(
+            UPSERT_REVENUE_SQL, records.to_dict(orient="records")
         )
-        self.conn.commit()
 
-        # 記錄已上傳
+        # 記錄已上傳，與資料於同一交易提交
         self.conn.execute(
-            text(
-                "INSERT INTO QuarterRevenueUploaded "
-                "(Year, Season, UploadedAt, RecordCount) "
-                "VALUES (:year, :season, :uploaded_at, :count)"
-            ),
+            INSERT_UPLOADED_SQL,
             {
                 "year": year,
                 "season": season,
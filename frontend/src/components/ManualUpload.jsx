@@ -206,8 +206,11 @@ function JobItem({ job }) {
           <div className="progress-text">
             {job.completed} / {job.total}
             {job.status === 'running' &&
-              job.current_db &&
-              ` - ${job.current_db} ${job.current_date}`}
+              job.progress &&
+              Object.keys(job.progress).length > 0 &&
+              ` - ${Object.entries(job.progress)
+                .map(([db, date]) => `${db} ${date}`)
+                .join(', ')}`}
           </div>
         </div>
       )}
@@ -1,6 +1,8 @@
 """MySQL 連線路由模組。"""
 
-from clients import mysql_conn, mysql_conn_db
+from contextlib import contextmanager
+
+from clients import mysql_conn, mysql_conn_db, mysql_engine
 
 
 class MySQLRouter:
@@ -9,6 +11,8 @@ class MySQLRouter:
     def __init__(self, host, user, password, db_name=None):
         """初始化 MySQLRouter。
 
+        連線於首次取用 mysql_conn 時才自連線池取出。
+
         Args:
             host (str): MySQL 主機位址。
             user (str): MySQL 使用者名稱。
@@ -19,7 +23,7 @@ class MySQLRouter:
         self.user = user
         self.password = password
         self.db_name = db_name
-        self.conn = self._build_mysql_conn()
+        self.conn = None
 
     def _build_mysql_conn(self):
         """根據參數建立 MySQL 連線。
@@ -35,9 +39,35 @@ class MySQLRouter:
             conn = mysql_conn(self.host, self.user, self.password)
         return conn
 
+    @property
+    def engine(self):
+        """取得共用連線池的 MySQL Engine。
+
+        Returns:
+            sqlalchemy.engine.Engine: MySQL Engine 物件。
+        """
+        return mysql_engine(self.host, self.user, self.password, self.db_name)
+
+    @contextmanager
+    def connection(self):
+        """自連線池取出短期使用的連線，離開區塊時歸還。
+
+        Yields:
+            sqlalchemy.engine.Connection: MySQL 連線物件。
+
+        Example:
+            >>> with MySQLRouter(host, user, password, db_name).connection() as conn:
+            ...     conn.execute(text("SELECT 1"))
+        """
+        conn = self.engine.connect()
+        try:
+            yield conn
+        finally:
+            conn.close()
+
     @property
     def mysql_conn(self):
-        """取得 MySQL 連線物件。
+        """取得 MySQL 連線物件，首次取用時建立。
 
         Returns:
             sqlalchemy.engine.Connection: MySQL 連線物件。
@@ -48,4 +78,6 @@ class MySQLRouter:
             >>> conn.execute("SELECT 1")
             >>> conn.close()
         """
+        if self.conn is None:
+            self.conn = self._build_mysql_conn()
         return self.conn
@@ -1,13 +1,21 @@
 """DataUploadBase 單元測試模組。"""
 
 import unittest
+from datetime import datetime
+from typing import Optional
 from unittest.mock import MagicMock, patch
 
+import orjson
 import pandas as pd
+import pymysql
 import requests
-from pydantic import BaseModel
+from pydantic import BaseModel, ValidationError
+from sqlalchemy import create_engine, text
 
-from data_upload.base import DataUploadBase
+from data_upload.base import (
+    DataUploadBase, load_data_insert, validate_schema, _coerce_frame,
+    _schema_fields,
+)
 
 
 class SimpleUploadType(BaseModel):
@@ -17,6 +25,15 @@ class SimpleUploadType(BaseModel):
     Value: float
 
 
+class TypedUploadType(BaseModel):
+    """測試用多型別 schema。"""
+
+    Date: datetime
+    SecurityCode: str
+    Volume: int
+    Change: Optional[float] = None
+
+
 class ConcreteUploader(DataUploadBase):
     """測試用具體上傳器。"""
 
@@ -53,28 +70,29 @@ class TestCrawData(unittest.TestCase):
         self.mock_conn = MagicMock()
         self.uploader = ConcreteUploader(self.mock_conn)
 
-    @patch("data_upload.base.requests.get")
+    @patch("data_upload.base.http_session.get")
     def test_craw_data_success(self, mock_get):
         """測試成功取得爬蟲資料。"""
         mock_response = MagicMock()
-        mock_response.json.return_value = {
+        mock_response.content = orjson.dumps({
             "data": [
                 {"SecurityCode": "2330", "Value": 100.0},
                 {"SecurityCode": "2317", "Value": 200.0},
             ]
-        }
+        })
         mock_response.raise_for_status.return_value = None
         mock_get.return_value = mock_response
 
         df = self.uploader.craw_data("2026-01-02")
 
         mock_get.assert_called_once_with(
-            "http://localhost:6738/test", params={"date": "2026-01-02"}
+            "http://localhost:6738/test", params={"date": "2026-01-02"},
+            timeout=60,
         )
         self.assertEqual(len(df), 2)
         self.assertEqual(df.iloc[0]["SecurityCode"], "2330")
 
-    @patch("data_upload.base.requests.get")
+    @patch("data_upload.base.http_session.get")
     def test_craw_data_request_exception(self, mock_get):
         """測試爬蟲服務連線失敗時回傳空 DataFrame。"""
         mock_get.side_effect = requests.RequestException("Connection refused")
@@ -83,11 +101,20 @@ class TestCrawData(unittest.TestCase):
 
         self.assertTrue(df.empty)
 
-    @patch("data_upload.base.requests.get")
+    @patch("data_upload.base.http_session.get")
+    def test_craw_data_timeout(self, mock_get):
+        """測試爬蟲服務逾時時回傳空 DataFrame。"""
+        mock_get.side_effect = requests.Timeout("Read timed out")
+
+        df = self.uploader.craw_data("2026-01-02")
+
+        self.assertTrue(df.empty)
+
+    @patch("data_upload.base.http_session.get")
     def test_craw_data_missing_data_key(self, mock_get):
         """測試爬蟲回應缺少 data 欄位時回傳空 DataFrame。"""
         mock_response = MagicMock()
-        mock_response.json.return_value = {"error": "not found"}
+        mock_response.content = orjson.dumps({"error": "not found"})
         mock_response.raise_for_status.return_value = None
         mock_get.return_value = mock_response
 
@@ -95,11 +122,35 @@ class TestCrawData(unittest.TestCase):
 
         self.assertTrue(df.empty)
 
-    @patch("data_upload.base.requests.get")
+    @patch("data_upload.base.http_session.get")
+    def test_craw_data_invalid_json(self, mock_get):
+        """測試爬蟲回應非 JSON 時回傳空 DataFrame。"""
+        mock_response = MagicMock()
+        mock_response.content = b"<html>Bad Gateway</html>"
+        mock_response.raise_for_status.return_value = None
+        mock_get.return_value = mock_response
+
+        df = self.uploader.craw_data("2026-01-02")
+
+        self.assertTrue(df.empty)
+
+    @patch("data_upload.base.http_session.get")
     def test_craw_data_empty_data(self, mock_get):
         """測試爬蟲回應 data 為空列表時回傳空 DataFrame。"""
         mock_response = MagicMock()
-        mock_response.json.return_value = {"data": []}
+        mock_response.content = orjson.dumps({"data": []})
+        mock_response.raise_for_status.return_value = None
+        mock_get.return_value = mock_response
+
+        df = self.uploader.craw_data("2026-01-02")
+
+        self.assertEqual(len(df), 0)
+
+    @patch("data_upload.base.http_session.get")
+    def test_craw_data_null_data(self, mock_get):
+        """測試爬蟲回應 data 為 null 時回傳空 DataFrame。"""
+        mock_response = MagicMock()
+        mock_response.content = orjson.dumps({"data": None})
         mock_response.raise_for_status.return_value = None
         mock_get.return_value = mock_response
 
@@ -140,6 +191,202 @@ class TestCheckSchema(unittest.TestCase):
 
         self.assertAlmostEqual(result.iloc[0]["Value"], 99.5)
 
+    def test_check_schema_column_types(self):
+        """測試依欄位型別轉換，缺少的 Optional 欄位補為缺值。"""
+        self.uploader.UploadType = TypedUploadType
+        df = pd.DataFrame({
+            "Date": ["2026-01-02", "2026-01-02"],
+            "SecurityCode": ["2330", "2317"],
+            "Volume": ["1000", "2000"],
+        })
+
+        result = self.uploader.check_schema(df)
+
+        self.assertEqual(
+            list(result.columns),
+            ["Date", "SecurityCode", "Volume", "Change"],
+        )
+        self.assertEqual(result["Date"].iloc[0], pd.Timestamp("2026-01-02"))
+        self.assertEqual(result["Volume"].dtype, "int64")
+        self.assertEqual(result["Volume"].iloc[1], 2000)
+        self.assertTrue(result["Change"].isna().all())
+
+    def test_schema_fields_resolved_once(self):
+        """測試模型欄位型別只解析一次，Optional 欄位標記為選填。"""
+        _schema_fields.cache_clear()
+        self.uploader.UploadType = TypedUploadType
+        df = pd.DataFrame({
+            "Date": ["2026-01-02"],
+            "SecurityCode": ["2330"],
+            "Volume": [1000],
+        })
+
+        self.uploader.check_schema(df)
+        self.uploader.check_schema(df)
+
+        self.assertEqual(_schema_fields.cache_info().misses, 1)
+        self.assertEqual(_schema_fields(TypedUploadType), (
+            ("Date", datetime, False),
+            ("SecurityCode", str, False),
+            ("Volume", int, False),
+            ("Change", float, True),
+        ))
+
+    def test_check_schema_falls_back_to_pydantic(self):
+        """測試向量化轉換失敗時改以 Pydantic 逐列驗證。"""
+        self.uploader.UploadType = TypedUploadType
+        df = pd.DataFrame({
+            "Date": ["2026-01-02", "2026-01-02T10:00:00"],
+            "SecurityCode": ["2330", "2317"],
+            "Volume": [1000, 2000],
+        })
+
+        result = self.uploader.check_schema(df)
+
+        self.assertEqual(
+            result["Date"].iloc[1], pd.Timestamp("2026-01-02 10:00:00")
+        )
+        self.assertEqual(result["Volume"].tolist(), [1000, 2000])
+
+    def test_check_schema_invalid_required_raises(self):
+        """測試必填欄位無法轉換時拋出例外。"""
+        df = pd.DataFrame({
+            "SecurityCode": ["2330", "2317", "2454"],
+            "Value": [100.0, "abc", 200.0],
+        })
+
+        with self.assertRaises(ValueError):
+            self.uploader.check_schema(df)
+
+    def test_check_schema_invalid_optional_raises_anywhere(self):
+        """測試選填欄位的無效值不論位於哪一列皆拋出例外，而非轉為缺值。"""
+        self.uploader.UploadType = TypedUploadType
+        for values in (["abc", 1.0, 2.0], [1.0, "abc", 2.0]):
+            df = pd.DataFrame({
+                "Date": ["2026-01-02"] * 3,
+                "SecurityCode": ["2330", "2317", "2454"],
+                "Volume": [1000, 2000, 3000],
+                "Change": values,
+            })
+
+            with self.subTest(values=values):
+                with self.assertRaises(ValueError):
+                    self.uploader.check_schema(df)
+
+    def test_check_schema_fractional_int_raises(self):
+        """測試整數欄位含小數值時拋出例外，而非截斷為整數。"""
+        self.uploader.UploadType = TypedUploadType
+        df = pd.DataFrame({
+            "Date": ["2026-01-02"] * 3,
+            "SecurityCode": ["2330", "2317", "2454"],
+            "Volume": [1000.0, 1.7, 3000.0],
+        })
+
+        with self.assertRaises(ValueError):
+            self.uploader.check_schema(df)
+
+    def test_check_schema_empty_frame(self):
+        """測試空的 DataFrame 原樣回傳。"""
+        df = pd.DataFrame()
+
+        result = self.uploader.check_schema(df)
+
+        self.assertTrue(result.empty)
+
+
+class StrField(BaseModel):
+    """測試用文字欄位 schema。"""
+
+    v: str
+
+
+class IntField(BaseModel):
+    """測試用整數欄位 schema。"""
+
+    v: int
+
+
+class FloatField(BaseModel):
+    """測試用浮點數欄位 schema。"""
+
+    v: float
+
+
+class DatetimeField(BaseModel):
+    """測試用日期時間欄位 schema。"""
+
+    v: datetime
+
+
+class BoolField(BaseModel):
+    """測試用布林欄位 schema（向量化轉換未支援的型別）。"""
+
+    v: bool
+
+
+class TestSchemaPathParity(unittest.TestCase):
+    """測試向量化轉換與 Pydantic 逐列驗證接受與拒絕相同的輸入。"""
+
+    CASES = [
+        (StrField, ["2330", "2317"]),
+        (StrField, ["2330", 2330]),
+        (StrField, [1.5, 2.5]),
+        (IntField, ["1", "-2"]),
+        (IntField, [1.0, 2.0]),
+        (IntField, [1.0, 1.7]),
+        (IntField, [True, False]),
+        (IntField, ["1_000", "2"]),
+        (IntField, ["1.5", "2"]),
+        (IntField, ["abc", "2"]),
+        (FloatField, ["1.5", "1e3"]),
+        (FloatField, [1, 2]),
+        (FloatField, [" 1.5 ", "1"]),
+        (FloatField, ["1,000", "1"]),
+        (FloatField, [True, False]),
+        (DatetimeField, ["2026-01-02", "2026-01-02 10:00"]),
+        (DatetimeField, [pd.Timestamp("2026-01-02"), datetime(2026, 1, 3)]),
+        (DatetimeField, ["2026/01/02", "2026-01-02"]),
+        (DatetimeField, ["2026-02-30", "2026-01-02"]),
+        (DatetimeField, [1700000000, 1700000001]),
+        (DatetimeField, ["20260102", "2026-01-02"]),
+        (BoolField, [True, "yes"]),
+        (BoolField, ["maybe", True]),
+    ]
+
+    @staticmethod
+    def _pydantic(model, values):
+        """以 Pydantic 逐列驗證，拒絕時回傳 None。"""
+        try:
+            return [model(v=value).v for value in values]
+        except ValidationError:
+            return None
+
+    def test_vectorized_matches_pydantic(self):
+        """測試向量化轉換成功時，結果與 Pydantic 一致。"""
+        for model, values in self.CASES:
+            with self.subTest(model=model.__name__, values=values):
+                try:
+                    result = _coerce_frame(
+                        pd.DataFrame({"v": values}), model
+                    )["v"].tolist()
+                except (ValueError, TypeError):
+                    continue
+
+                self.assertEqual(result, self._pydantic(model, values))
+
+    def test_validate_schema_matches_pydantic(self):
+        """測試 validate_schema 與 Pydantic 接受與拒絕相同的輸入。"""
+        for model, values in self.CASES:
+            expected = self._pydantic(model, values)
+            df = pd.DataFrame({"v": values})
+            with self.subTest(model=model.__name__, values=values):
+                if expected is None:
+                    with self.assertRaises(ValidationError):
+                        validate_schema(df, model)
+                else:
+                    result = validate_schema(df, model)
+                    self.assertEqual(result["v"].tolist(), expected)
+
 
 class TestCheckDate(unittest.TestCase):
     """測試 check_date 方法。"""
@@ -165,6 +412,17 @@ class TestCheckDate(unittest.TestCase):
 
         self.assertFalse(result)
 
+    def test_check_date_binds_parameter(self):
+        """測試日期以綁定參數傳入，而非組入 SQL 字串。"""
+        self.mock_conn.execute.return_value.scalar.return_value = None
+
+        result = self.uploader.check_date("2026-01-02")
+
+        sql, params = self.mock_conn.execute.call_args[0]
+        self.assertNotIn("2026-01-02", str(sql))
+        self.assertEqual(params, {"date": "2026-01-02"})
+        self.assertFalse(result)
+
 
 class TestUploadDf(unittest.TestCase):
     """測試 upload_df 方法。"""
@@ -187,9 +445,10 @@ class TestUploadDf(unittest.TestCase):
 
         mock_to_sql.assert_called_once_with(
             "DailyPrice", self.mock_conn,
-            if_exists='append', index=False, chunksize=1000
+            if_exists='append', index=False,
+            chunksize=5000, method=load_data_insert
         )
-        self.mock_conn.commit.assert_called_once()
+        self.mock_conn.commit.assert_not_called()
 
     @patch("data_upload.base.pd.DataFrame.to_sql")
     def test_upload_df_preprocesses_data(self, mock_to_sql):
@@ -205,6 +464,76 @@ class TestUploadDf(unittest.TestCase):
         # 原始 df 不應被修改
         self.assertIn("StockName", df.columns)
 
+    @patch("data_upload.base.pd.DataFrame.to_sql")
+    def test_upload_df_chunksize_respects_param_limit(self, mock_to_sql):
+        """測試寬表的每批列數不超過 MySQL 參數上限。"""
+        columns = {f"Col{i}": [1.0] for i in range(100)}
+        df = pd.DataFrame({"StockName": ["台積電"], **columns})
+
+        with patch.object(self.uploader, "check_schema", side_effect=lambda d: d):
+            self.uploader.upload_df(df)
+
+        chunksize = mock_to_sql.call_args.kwargs["chunksize"]
+        self.assertEqual(chunksize, 655)
+        self.assertLessEqual(chunksize * 100, 65535)
+
+
+class TestLoadDataInsert(unittest.TestCase):
+    """測試 load_data_insert 函式。"""
+
+    def setUp(self):
+        """初始化測試環境。"""
+        self.mock_conn = MagicMock()
+        self.mock_cursor = (
+            self.mock_conn.connection.driver_connection.cursor.return_value
+        )
+        self.mock_table = MagicMock()
+        self.mock_table.name = "DailyPrice"
+
+    def test_load_data_writes_csv(self):
+        """測試以 LOAD DATA 載入暫存 CSV，NULL 不加引號。"""
+        written = {}
+
+        def capture(sql, args):
+            with open(args[0], encoding="utf-8") as f:
+                written["content"] = f.read()
+
+        self.mock_cursor.execute.side_effect = capture
+        self.mock_cursor.rowcount = 2
+
+        result = load_data_insert(
+            self.mock_table, self.mock_conn, ["SecurityCode", "Value"],
+            iter([("2330", 100.5), ('a"b', None)]),
+        )
+
+        sql = self.mock_cursor.execute.call_args[0][0]
+        self.assertIn("LOAD DATA LOCAL INFILE", sql)
+        self.assertIn("`DailyPrice`", sql)
+        self.assertIn("(`SecurityCode`, `Value`)", sql)
+        self.assertEqual(
+            written["content"], '"2330","100.5"\n"a""b",NULL\n'
+        )
+        self.assertEqual(result, 2)
+        self.mock_conn.execute.assert_not_called()
+        self.mock_cursor.close.assert_called_once()
+
+    def test_fallback_to_insert(self):
+        """測試伺服器不支援 LOAD DATA 時改用 INSERT。"""
+        self.mock_cursor.execute.side_effect = pymysql.err.OperationalError(
+            3948, "Loading local data is disabled"
+        )
+
+        load_data_insert(
+            self.mock_table, self.mock_conn, ["SecurityCode", "Value"],
+            iter([("2330", 100.5)]),
+        )
+
+        rows = self.mock_conn.execute.call_args[0][1]
+        insert = self.mock_table.table.insert.return_value
+        insert.prefix_with.assert_called_once_with("IGNORE")
+        self.assertEqual(rows, [{"SecurityCode": "2330", "Value": 100.5}])
+        self.mock_cursor.close.assert_called_once()
+
 
 class TestUploadDate(unittest.TestCase):
     """測試 upload_date 方法。"""
@@ -220,9 +549,10 @@ class TestUploadDate(unittest.TestCase):
 
         self.uploader.upload_date("2026-01-02", df)
 
-        call_args = self.mock_conn.execute.call_args[0][0]
-        self.assertIn("True", str(call_args))
-        self.mock_conn.commit.assert_called_once()
+        sql, params = self.mock_conn.execute.call_args[0]
+        self.assertIn("INSERT IGNORE", str(sql))
+        self.assertEqual(params, {"date": "2026-01-02", "open": True})
+        self.mock_conn.commit.assert_not_called()
 
     def test_upload_date_without_data(self):
         """測試無交易資料時記錄 Open=False。"""
@@ -230,9 +560,9 @@ class TestUploadDate(unittest.TestCase):
 
         self.uploader.upload_date("2026-01-02", df)
 
-        call_args = self.mock_conn.execute.call_args[0][0]
-        self.assertIn("False", str(call_args))
-        self.mock_conn.commit.assert_called_once()
+        params = self.mock_conn.execute.call_args[0][1]
+        self.assertEqual(params, {"date": "2026-01-02", "open": False})
+        self.mock_conn.commit.assert_not_called()
 
 
 class TestUpload(unittest.TestCase):
@@ -254,7 +584,7 @@ class TestUpload(unittest.TestCase):
     @patch("data_upload.base.pd.DataFrame.to_sql")
     def test_upload_with_data(self, mock_to_sql):
         """測試有資料時執行完整上傳流程。"""
-        self.mock_conn.execute.return_value.scalar.return_value = 0
+        self.mock_conn.in_transaction.return_value = False
 
         df = pd.DataFrame({
             "SecurityCode": ["2330"],
@@ -273,6 +603,53 @@ class TestUpload(unittest.TestCase):
         with patch.object(self.uploader, "craw_data", return_value=df):
             self.uploader.upload("2026-01-02")
 
+        # 新股票代碼、當日資料與日期記錄在明確開啟的同一交易中寫入
+        mock_to_sql.assert_called_once()
+        self.mock_conn.begin.assert_called_once()
+        self.mock_conn.begin.return_value.__exit__.assert_called_once()
+        self.mock_conn.commit.assert_not_called()
+
+    @patch("data_upload.base.load_data_insert", None)
+    def test_upload_rolls_back_rows_when_date_marker_fails(self):
+        """測試日期記錄寫入失敗時，新股票代碼與當日資料一併回滾。"""
+        engine = create_engine("sqlite://")
+        self.addCleanup(engine.dispose)
+        with engine.begin() as setup:
+            setup.execute(text(
+                "CREATE TABLE StockName (SecurityCode TEXT, StockName TEXT)"
+            ))
+            setup.execute(text(
+                "CREATE TABLE DailyPrice (SecurityCode TEXT, Value REAL)"
+            ))
+            setup.execute(text(
+                "CREATE TABLE UploadDate (Date TEXT, Open INTEGER)"
+            ))
+
+        df = pd.DataFrame({
+            "SecurityCode": ["2330", "2317"],
+            "StockName": ["台積電", "鴻海"],
+            "Value": [100.0, 50.0],
+        })
+
+        with engine.connect() as conn:
+            uploader = ConcreteUploader(conn)
+            with patch.object(
+                uploader, "craw_data", return_value=df
+            ), patch.object(
+                uploader, "upload_date", side_effect=RuntimeError("寫入失敗")
+            ):
+                with self.assertRaises(RuntimeError):
+                    # check_date 的查詢會自動開啟交易，寫入仍須整批回滾
+                    uploader.upload("2026-01-02")
+
+            counts = [
+                conn.execute(text(f"SELECT COUNT(*) FROM {table}")).scalar()
+                for table in ("StockName", "DailyPrice")
+            ]
+
+        self.assertEqual(counts, [0, 0])
+        self.assertIsNone(uploader._stock_codes)
+
     def test_upload_without_data(self):
         """測試無資料時只記錄日期不上傳。"""
         self.mock_conn.execute.return_value.scalar.return_value = 0
@@ -285,6 +662,52 @@ class TestUpload(unittest.TestCase):
                 mock_upload_df.assert_not_called()
 
 
+class TestBulkUpload(unittest.TestCase):
+    """測試 bulk_upload 方法。"""
+
+    def setUp(self):
+        """初始化測試環境。"""
+        self.mock_conn = MagicMock()
+        self.uploader = ConcreteUploader(self.mock_conn)
+
+    def test_bulk_upload_stores_in_date_order(self):
+        """測試平行爬取後依日期順序寫入，無資料的日期只記錄日期。"""
+        frames = {
+            "2026-01-02": pd.DataFrame({"SecurityCode": ["2330"]}),
+            "2026-01-03": pd.DataFrame(),
+            "2026-01-04": pd.DataFrame({"SecurityCode": ["2317"]}),
+        }
+        stored = []
+
+        with patch.object(
+            self.uploader, "craw_data", side_effect=frames.get
+        ), patch.object(
+            self.uploader, "register_stock_names"
+        ), patch.object(
+            self.uploader, "upload_df"
+        ) as mock_upload_df, patch.object(
+            self.uploader, "upload_date",
+            side_effect=lambda date, df: stored.append(date),
+        ):
+            self.uploader.bulk_upload(list(frames), max_workers=3)
+
+        self.assertEqual(stored, list(frames))
+        self.assertEqual(mock_upload_df.call_count, 2)
+
+    def test_bulk_upload_calls_before_crawl(self):
+        """測試每次爬取前呼叫 before_crawl。"""
+        before_crawl = MagicMock()
+
+        with patch.object(
+            self.uploader, "craw_data", return_value=pd.DataFrame()
+        ), patch.object(self.uploader, "upload_date"):
+            self.uploader.bulk_upload(
+                ["2026-01-02", "2026-01-03"], before_crawl=before_crawl
+            )
+
+        self.assertEqual(before_crawl.call_count, 2)
+
+
 class TestRegisterStockNames(unittest.TestCase):
     """測試 register_stock_names 方法。"""
 
@@ -338,7 +761,7 @@ class TestRegisterStockNames(unittest.TestCase):
             "StockName", self.mock_conn,
             if_exists='append', index=False
         )
-        self.mock_conn.commit.assert_called_once()
+        self.mock_conn.commit.assert_not_called()
 
     @patch("data_upload.base.pd.DataFrame.to_sql")
     def test_register_deduplicates_by_code(self, mock_to_sql):
@@ -354,7 +777,48 @@ class TestRegisterStockNames(unittest.TestCase):
         self.uploader.register_stock_names(df)
 
         mock_to_sql.assert_called_once()
-        self.mock_conn.commit.assert_called_once()
+        self.mock_conn.commit.assert_not_called()
+
+    @patch.object(pd.DataFrame, "to_sql", autospec=True)
+    def test_register_large_registry(self, mock_to_sql):
+        """測試大量既有代碼時只註冊新代碼，且每個代碼僅一次。"""
+        mock_result = MagicMock()
+        mock_result.fetchall.return_value = [
+            (f"{i:05d}",) for i in range(10000)
+        ]
+        self.mock_conn.execute.return_value = mock_result
+
+        codes = [f"{i:05d}" for i in range(9990, 10010)] * 2
+        df = pd.DataFrame({
+            "SecurityCode": codes,
+            "StockName": [f"股票{c}" for c in codes],
+        })
+        self.uploader.register_stock_names(df)
+
+        new_stocks = mock_to_sql.call_args.args[0]
+        self.assertEqual(
+            new_stocks["SecurityCode"].tolist(),
+            [f"{i:05d}" for i in range(10000, 10010)],
+        )
+        self.assertEqual(len(self.uploader._stock_codes), 10010)
+
+    @patch("data_upload.base.pd.DataFrame.to_sql")
+    def test_existing_codes_cached(self, mock_to_sql):
+        """測試已存在代碼只查詢一次，新增的代碼會加入快取。"""
+        mock_result = MagicMock()
+        mock_result.fetchall.return_value = [("2330",)]
+        self.mock_conn.execute.return_value = mock_result
+
+        df = pd.DataFrame({
+            "SecurityCode": ["2330", "2317"],
+            "StockName": ["台積電", "鴻海"],
+        })
+        self.uploader.register_stock_names(df)
+        self.uploader.register_stock_names(df)
+
+        self.mock_conn.execute.assert_called_once()
+        mock_to_sql.assert_called_once()
+        self.assertEqual(self.uploader._stock_codes, {"2330", "2317"})
 
 
 class TestRegisterStockNamesTpex(unittest.TestCase):
@@ -385,7 +849,7 @@ class TestRegisterStockNamesTpex(unittest.TestCase):
             "StockName", self.mock_conn,
             if_exists='append', index=False
         )
-        self.mock_conn.commit.assert_called_once()
+        self.mock_conn.commit.assert_not_called()
 
 
 if __name__ == "__main__":
@@ -4,6 +4,8 @@ import unittest
 from unittest.mock import patch, MagicMock, call
 import datetime
 
+import DailyUpload
+
 
 class TestGetMissingDates(unittest.TestCase):
     """測試 get_missing_dates 函式。"""
@@ -11,8 +13,6 @@ class TestGetMissingDates(unittest.TestCase):
     @patch("DailyUpload.MySQLRouter")
     def test_no_missing_dates(self, mock_router_cls):
         """測試所有日期皆已上傳時回傳空清單。"""
-        import DailyUpload
-
         today = datetime.datetime.now()
         date_list = [
             (today - datetime.timedelta(days=i)).strftime("%Y-%m-%d")
@@ -24,18 +24,17 @@ class TestGetMissingDates(unittest.TestCase):
 
         mock_conn = MagicMock()
         mock_conn.execute.return_value.fetchall.return_value = uploaded
-        mock_router_cls.return_value.mysql_conn = mock_conn
+        connection = mock_router_cls.return_value.connection
+        connection.return_value.__enter__.return_value = mock_conn
 
         result = DailyUpload.get_missing_dates("TWSE", days=5)
 
         self.assertEqual(result, [])
-        mock_conn.close.assert_called_once()
+        connection.return_value.__exit__.assert_called_once()
 
     @patch("DailyUpload.MySQLRouter")
     def test_some_missing_dates(self, mock_router_cls):
         """測試部分日期未上傳時回傳缺漏日期。"""
-        import DailyUpload
-
         today = datetime.datetime.now()
         # 只有今天和昨天已上傳
         uploaded = [
@@ -45,36 +44,35 @@ class TestGetMissingDates(unittest.TestCase):
 
         mock_conn = MagicMock()
         mock_conn.execute.return_value.fetchall.return_value = uploaded
-        mock_router_cls.return_value.mysql_conn = mock_conn
+        connection = mock_router_cls.return_value.connection
+        connection.return_value.__enter__.return_value = mock_conn
 
         result = DailyUpload.get_missing_dates("TWSE", days=5)
 
         # 應有 3 個缺漏日期 (days 2, 3, 4)
         self.assertEqual(len(result), 3)
-        mock_conn.close.assert_called_once()
+        connection.return_value.__exit__.assert_called_once()
 
     @patch("DailyUpload.MySQLRouter")
     def test_all_missing_dates(self, mock_router_cls):
         """測試完全沒有上傳紀錄時回傳全部日期。"""
-        import DailyUpload
-
         mock_conn = MagicMock()
         mock_conn.execute.return_value.fetchall.return_value = []
-        mock_router_cls.return_value.mysql_conn = mock_conn
+        connection = mock_router_cls.return_value.connection
+        connection.return_value.__enter__.return_value = mock_conn
 
         result = DailyUpload.get_missing_dates("TWSE", days=3)
 
         self.assertEqual(len(result), 3)
-        mock_conn.close.assert_called_once()
+        connection.return_value.__exit__.assert_called_once()
 
     @patch("DailyUpload.MySQLRouter")
     def test_uses_correct_db_name(self, mock_router_cls):
         """測試使用正確的資料庫名稱建立連線。"""
-        import DailyUpload
-
         mock_conn = MagicMock()
         mock_conn.execute.return_value.fetchall.return_value = []
-        mock_router_cls.return_value.mysql_conn = mock_conn
+        connection = mock_router_cls.return_value.connection
+        connection.return_value.__enter__.return_value = mock_conn
 
         DailyUpload.get_missing_dates("TPEX", days=1)
 
@@ -86,9 +84,58 @@ class TestGetMissingDates(unittest.TestCase):
         )
 
 
+class TestHostRateLimiter(unittest.TestCase):
+    """測試 HostRateLimiter 類別。"""
+
+    @patch("DailyUpload.random.uniform", return_value=2.0)
+    @patch("DailyUpload.time.sleep")
+    @patch("DailyUpload.time.monotonic", return_value=100.0)
+    def test_acquire_spaces_requests(
+        self, mock_monotonic, mock_sleep, mock_uniform
+    ):
+        """測試連續請求依預約時間點依序等待。"""
+        limiter = DailyUpload.HostRateLimiter(1, 3)
+
+        limiter.acquire()
+        limiter.acquire()
+        limiter.acquire()
+
+        mock_uniform.assert_called_with(1, 3)
+        self.assertEqual(
+            mock_sleep.call_args_list, [call(2.0), call(4.0)]
+        )
+
+    @patch("DailyUpload.random.uniform", return_value=2.0)
+    @patch("DailyUpload.time.sleep")
+    @patch("DailyUpload.time.monotonic")
+    def test_acquire_no_wait_after_interval(
+        self, mock_monotonic, mock_sleep, mock_uniform
+    ):
+        """測試距上次請求已超過間隔時不需等待。"""
+        mock_monotonic.side_effect = [100.0, 105.0]
+        limiter = DailyUpload.HostRateLimiter(1, 3)
+
+        limiter.acquire()
+        limiter.acquire()
+
+        mock_sleep.assert_not_called()
+
+
 class TestDailyCraw(unittest.TestCase):
     """測試 daily_craw 函式。"""
 
+    def setUp(self):
+        """以新的速率限制器取代共用實例，避免測試間互相影響。"""
+        patcher = patch(
+            "DailyUpload.crawler_rate_limiter",
+            DailyUpload.HostRateLimiter(
+                DailyUpload.CRAWLER_MIN_INTERVAL,
+                DailyUpload.CRAWLER_MAX_INTERVAL,
+            ),
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
     @patch("DailyUpload.upload.day_upload")
     @patch("DailyUpload.time.sleep")
     @patch("DailyUpload.get_missing_dates")
@@ -96,8 +143,6 @@ class TestDailyCraw(unittest.TestCase):
         self, mock_get_missing, mock_sleep, mock_day_upload
     ):
         """測試所有資料皆已上傳時不進行爬取。"""
-        import DailyUpload
-
         mock_get_missing.return_value = []
 
         DailyUpload.daily_craw()
@@ -111,8 +156,6 @@ class TestDailyCraw(unittest.TestCase):
         self, mock_get_missing, mock_sleep, mock_day_upload
     ):
         """測試有缺漏日期時進行爬取上傳。"""
-        import DailyUpload
-
         mock_get_missing.side_effect = [
             ["2026-01-03", "2026-01-02"],  # TWSE
             [],  # TPEX
@@ -134,9 +177,7 @@ class TestDailyCraw(unittest.TestCase):
     def test_daily_craw_pauses_between_dates(
         self, mock_get_missing, mock_sleep, mock_day_upload
     ):
-        """測試每次爬取之間有隨機暫停。"""
-        import DailyUpload
-
+        """測試第一次爬取立即進行，之後每次爬取之間有隨機暫停。"""
         mock_get_missing.side_effect = [
             ["2026-01-02", "2026-01-03"],  # TWSE
             [],  # TPEX
@@ -147,7 +188,46 @@ class TestDailyCraw(unittest.TestCase):
 
         DailyUpload.daily_craw()
 
-        self.assertEqual(mock_sleep.call_count, 2)
+        self.assertEqual(mock_sleep.call_count, 1)
+
+    @patch("DailyUpload.upload.day_upload")
+    @patch("DailyUpload.time.sleep")
+    @patch("DailyUpload.get_missing_dates")
+    def test_daily_craw_runs_dbs_in_parallel(
+        self, mock_get_missing, mock_sleep, mock_day_upload
+    ):
+        """測試多個資料來源各自補抓，且每個來源內維持日期順序。"""
+        mock_get_missing.side_effect = [
+            ["2026-01-03", "2026-01-02"],  # TWSE
+            ["2026-01-02"],  # TPEX
+            [],  # TAIFEX
+            ["2026-01-04", "2026-01-02"],  # FAOI
+            [],  # MGTS
+        ]
+
+        DailyUpload.daily_craw()
+
+        self.assertEqual(mock_day_upload.call_count, 5)
+        by_db = {}
+        for c in mock_day_upload.call_args_list:
+            by_db.setdefault(c.args[1].dbname, []).append(c.args[0])
+        self.assertEqual(by_db, {
+            "TWSE": ["2026-01-02", "2026-01-03"],
+            "TPEX": ["2026-01-02"],
+            "FAOI": ["2026-01-02", "2026-01-04"],
+        })
+
+    @patch("DailyUpload.upload.day_upload", side_effect=Exception("連線失敗"))
+    @patch("DailyUpload.time.sleep")
+    @patch("DailyUpload.get_missing_dates")
+    def test_daily_craw_propagates_errors(
+        self, mock_get_missing, mock_sleep, mock_day_upload
+    ):
+        """測試補抓失敗時例外會傳遞給呼叫端。"""
+        mock_get_missing.side_effect = [["2026-01-02"], [], [], [], []]
+
+        with self.assertRaises(Exception):
+            DailyUpload.daily_craw()
 
     @patch("DailyUpload.upload.day_upload")
     @patch("DailyUpload.time.sleep")
@@ -156,8 +236,6 @@ class TestDailyCraw(unittest.TestCase):
         self, mock_get_missing, mock_sleep, mock_day_upload
     ):
         """測試遍歷所有資料來源。"""
-        import DailyUpload
-
         mock_get_missing.return_value = []
 
         DailyUpload.daily_craw()
@@ -9,9 +9,19 @@ from pydantic import ValidationError
 from data_upload.quarter_revenue import (
     QuarterRevenueType,
     QuarterRevenueUploader,
+    CHECK_UPLOADED_SQL,
     COLUMN_KEYWORD_MAPPING,
+    UPSERT_REVENUE_SQL,
+    _match_columns,
 )
 
+# 含合計列的 MOPS 表格，_clean_dataframe 不修改傳入的 DataFrame，可共用
+TOTAL_ROW_DF = pd.DataFrame({
+    "公司代號": ["2330", "合計"],
+    "公司名稱": ["台積電", ""],
+    "營業收入": [100000, 200000],
+})
+
 
 class TestQuarterRevenueType(unittest.TestCase):
     """測試 QuarterRevenueType schema。"""
@@ -86,17 +96,27 @@ class TestCheckUploaded(unittest.TestCase):
 
         self.assertFalse(result)
 
+    def test_uses_prebuilt_statement(self):
+        """測試使用預先建立的 SQL 語句並綁定參數。"""
+        self.mock_conn.execute.return_value.scalar.return_value = 0
+
+        self.uploader.check_uploaded(113, 2)
+
+        self.mock_conn.execute.assert_called_once_with(
+            CHECK_UPLOADED_SQL, {"year": 113, "season": 2}
+        )
+
 
 class TestCleanDataframe(unittest.TestCase):
     """測試 _clean_dataframe 方法。"""
 
-    def setUp(self):
-        """初始化測試環境。"""
-        self.mock_conn = MagicMock()
+    @classmethod
+    def setUpClass(cls):
+        """建立本類別共用的上傳器（測試不修改其狀態）。"""
         with patch.object(
             QuarterRevenueUploader, "_ensure_tables"
         ):
-            self.uploader = QuarterRevenueUploader(self.mock_conn)
+            cls.uploader = QuarterRevenueUploader(MagicMock())
 
     def test_removes_non_numeric_code(self):
         """測試移除 CompanyCode 非數字開頭的列。"""
@@ -144,13 +164,9 @@ class TestCleanDataframe(unittest.TestCase):
 
     def test_drops_total_rows(self):
         """測試移除合計列。"""
-        df = pd.DataFrame({
-            "公司代號": ["2330", "合計"],
-            "公司名稱": ["台積電", ""],
-            "營業收入": [100000, 200000],
-        })
-
-        result = self.uploader._clean_dataframe(df, 113, 1, "sii")
+        result = self.uploader._clean_dataframe(
+            TOTAL_ROW_DF, 113, 1, "sii"
+        )
 
         self.assertEqual(len(result), 1)
 
@@ -183,17 +199,39 @@ class TestCleanDataframe(unittest.TestCase):
         self.assertEqual(result["OperatingIncome"].iloc[0], 200000000)
         self.assertEqual(result["NetIncome"].iloc[0], 180000000)
 
+    def test_does_not_modify_input(self):
+        """測試處理多層欄位時不修改傳入的 DataFrame。"""
+        df = pd.DataFrame(
+            [["2330", "台積電", "100"]],
+            columns=pd.MultiIndex.from_tuples([
+                ("公司代號", ""), ("公司名稱", ""), ("營業收入", "千元"),
+            ]),
+        )
+
+        result = self.uploader._clean_dataframe(df, 113, 1, "sii")
+
+        self.assertIsInstance(df.columns, pd.MultiIndex)
+        self.assertEqual(result["Revenue"].iloc[0], 100)
+
+    def test_shared_input_reusable(self):
+        """測試同一 DataFrame 可重複處理並得到相同結果。"""
+        first = self.uploader._clean_dataframe(TOTAL_ROW_DF, 113, 1, "sii")
+        second = self.uploader._clean_dataframe(TOTAL_ROW_DF, 113, 1, "sii")
+
+        pd.testing.assert_frame_equal(first, second)
+        self.assertEqual(TOTAL_ROW_DF["公司代號"].tolist(), ["2330", "合計"])
+
 
 class TestBuildColumnMapping(unittest.TestCase):
     """測試 _build_column_mapping 方法。"""
 
-    def setUp(self):
-        """初始化測試環境。"""
-        self.mock_conn = MagicMock()
+    @classmethod
+    def setUpClass(cls):
+        """建立本類別共用的上傳器（測試不修改其狀態）。"""
         with patch.object(
             QuarterRevenueUploader, "_ensure_tables"
         ):
-            self.uploader = QuarterRevenueUploader(self.mock_conn)
+            cls.uploader = QuarterRevenueUploader(MagicMock())
 
     def test_mapping_standard_columns(self):
         """測試標準欄位名稱對應。"""
@@ -244,6 +282,29 @@ class TestBuildColumnMapping(unittest.TestCase):
             result["營業外收入及支出"], "NonOperatingIncome"
         )
 
+    def test_matches_keyword_inside_header(self):
+        """測試多層欄位合併後的名稱仍能匹配關鍵字。"""
+        columns = ["損益表 營業外收入及支出(千元)", "本期 稅後淨利"]
+
+        result = self.uploader._build_column_mapping(columns)
+
+        self.assertEqual(
+            result["損益表 營業外收入及支出(千元)"], "NonOperatingIncome"
+        )
+        self.assertEqual(result["本期 稅後淨利"], "NetIncome")
+
+    def test_mapping_cached_by_columns(self):
+        """測試相同欄位組合重複使用對應結果，且回傳值可安全修改。"""
+        columns = ["公司代號", "公司名稱", "快取測試欄位"]
+        _match_columns.cache_clear()
+
+        first = self.uploader._build_column_mapping(columns)
+        first["公司代號"] = "Changed"
+        second = self.uploader._build_column_mapping(columns)
+
+        self.assertEqual(_match_columns.cache_info().hits, 1)
+        self.assertEqual(second["公司代號"], "CompanyCode")
+
 
 class TestCrawlData(unittest.TestCase):
     """測試 crawl_data 方法。"""
@@ -302,6 +363,97 @@ class TestCrawlData(unittest.TestCase):
         self.assertIn("2330", result["CompanyCode"].values)
         self.assertIn("1102", result["CompanyCode"].values)
 
+    def test_skips_unrelated_tables(self):
+        """測試略過不含公司代號的版面表格。"""
+        html = """
+        <html><body>
+        <table><tr><td>查詢條件</td><td>上市</td></tr></table>
+        <table>
+            <tr><th>公司代號</th><th>公司名稱</th>
+                <th>產業別</th><th>營業收入</th></tr>
+            <tr><td>2330</td><td>台積電</td>
+                <td>半導體業</td><td>100</td></tr>
+        </table>
+        </body></html>
+        """
+        self.uploader._fetch_html = MagicMock(return_value=html)
+
+        with patch.object(
+            self.uploader, "_clean_dataframe",
+            wraps=self.uploader._clean_dataframe,
+        ) as mock_clean:
+            result = self.uploader.crawl_data(113, 1)
+
+        mock_clean.assert_called_once()
+        self.assertEqual(result["CompanyCode"].tolist(), ["2330"])
+
+
+class TestCheckSchema(unittest.TestCase):
+    """測試 check_schema 欄位驗證與型別轉換。"""
+
+    @classmethod
+    def setUpClass(cls):
+        """建立本類別共用的上傳器（測試不修改其狀態）。"""
+        with patch.object(
+            QuarterRevenueUploader, "_ensure_tables"
+        ):
+            cls.uploader = QuarterRevenueUploader(MagicMock())
+
+    def test_column_types(self):
+        """測試欄位依 schema 轉換型別，缺少的欄位補為缺值。"""
+        df = pd.DataFrame({
+            "CompanyCode": ["2330", "2317"],
+            "CompanyName": ["台積電", None],
+            "EPS": [10.53, float("nan")],
+            "Revenue": [592559000.0, float("nan")],
+            "Year": [113, 113],
+            "Season": [1, 1],
+            "TYPEK": ["sii", "sii"],
+        })
+
+        result = self.uploader.check_schema(df)
+
+        self.assertEqual(
+            list(result.columns),
+            list(QuarterRevenueType.model_fields),
+        )
+        self.assertEqual(result["Year"].dtype, "int64")
+        self.assertEqual(result["Revenue"].dtype, "Int64")
+        self.assertEqual(result["Revenue"].iloc[0], 592559000)
+        self.assertTrue(pd.isna(result["Revenue"].iloc[1]))
+        self.assertTrue(pd.isna(result["CompanyName"].iloc[1]))
+        self.assertTrue(result["NetIncome"].isna().all())
+
+    def test_missing_required_raises(self):
+        """測試缺少必要欄位時拋出 ValidationError。"""
+        df = pd.DataFrame({
+            "CompanyCode": ["2330"],
+            "Year": [113],
+            "Season": [1],
+        })
+
+        with self.assertRaises(ValidationError):
+            self.uploader.check_schema(df)
+
+    def test_invalid_middle_row_raises(self):
+        """測試非首尾列的無效值同樣拋出 ValidationError。"""
+        df = pd.DataFrame({
+            "CompanyCode": ["2330", "2317", "2454"],
+            "Revenue": [592559000.0, 1.7, 1000.0],
+            "Year": [113, 113, 113],
+            "Season": [1, 1, 1],
+            "TYPEK": ["sii", "sii", "sii"],
+        })
+
+        with self.assertRaises(ValidationError):
+            self.uploader.check_schema(df)
+
+    def test_empty_frame(self):
+        """測試空的 DataFrame 原樣回傳。"""
+        result = self.uploader.check_schema(pd.DataFrame())
+
+        self.assertTrue(result.empty)
+
 
 class TestUpload(unittest.TestCase):
     """測試 upload 方法。"""
@@ -333,6 +485,29 @@ class TestUpload(unittest.TestCase):
 
         self.assertEqual(result, 0)
 
+    def test_upload_in_one_transaction(self):
+        """測試資料與上傳記錄以 executemany 寫入並一次提交。"""
+        self.uploader.check_uploaded = MagicMock(return_value=False)
+        self.uploader.crawl_data = MagicMock(return_value=pd.DataFrame({
+            "Year": [113, 113],
+            "Season": [1, 1],
+            "CompanyCode": ["2330", "2317"],
+            "TYPEK": ["sii", "sii"],
+            "Revenue": [592559000.0, float("nan")],
+        }))
+
+        result = self.uploader.upload(113, 1)
+
+        self.assertEqual(result, 2)
+        stmt, records = self.mock_conn.execute.call_args_list[0].args
+        self.assertIs(stmt, UPSERT_REVENUE_SQL)
+        self.assertIn("ON DUPLICATE KEY UPDATE", str(stmt))
+        self.assertEqual(len(records), 2)
+        self.assertEqual(records[0]["Revenue"], 592559000)
+        self.assertIsNone(records[1]["Revenue"])
+        self.assertIsNone(records[1]["NetIncome"])
+        self.mock_conn.commit.assert_called_once()
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -17,6 +17,8 @@ class TestMySQLRouter(unittest.TestCase):
 
         router = MySQLRouter("localhost:3306", "root", "password", "TWSE")
 
+        mock_mysql_conn_db.assert_not_called()
+        self.assertEqual(router.mysql_conn, mock_conn)
         mock_mysql_conn_db.assert_called_once_with(
             "localhost:3306", "root", "password", "TWSE"
         )
@@ -34,6 +36,7 @@ class TestMySQLRouter(unittest.TestCase):
 
         router = MySQLRouter("localhost:3306", "root", "password")
 
+        self.assertEqual(router.mysql_conn, mock_conn)
         mock_mysql_conn.assert_called_once_with(
             "localhost:3306", "root", "password"
         )
@@ -49,6 +52,31 @@ class TestMySQLRouter(unittest.TestCase):
         router = MySQLRouter("localhost:3306", "root", "password", "TWSE")
 
         self.assertIs(router.mysql_conn, mock_conn)
+        self.assertIs(router.mysql_conn, mock_conn)
+        mock_mysql_conn_db.assert_called_once()
+
+    @patch("routers.mysql_engine")
+    def test_engine_property(self, mock_mysql_engine):
+        """測試 engine 屬性回傳共用的 Engine。"""
+        router = MySQLRouter("localhost:3306", "root", "password", "TWSE")
+
+        self.assertIs(router.engine, mock_mysql_engine.return_value)
+        mock_mysql_engine.assert_called_once_with(
+            "localhost:3306", "root", "password", "TWSE"
+        )
+
+    @patch("routers.mysql_engine")
+    def test_connection_returns_to_pool(self, mock_mysql_engine):
+        """測試 connection 區塊結束時歸還連線，發生例外時亦同。"""
+        mock_conn = mock_mysql_engine.return_value.connect.return_value
+        router = MySQLRouter("localhost:3306", "root", "password", "TWSE")
+
+        with self.assertRaises(RuntimeError):
+            with router.connection() as conn:
+                self.assertIs(conn, mock_conn)
+                raise RuntimeError("查詢失敗")
+
+        mock_conn.close.assert_called_once()
 
 
 if __name__ == "__main__":
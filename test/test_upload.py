@@ -1,9 +1,13 @@
 """批次上傳入口模組單元測試。"""
 
+import os
+import tempfile
 import unittest
 from unittest.mock import patch, MagicMock
+from types import SimpleNamespace
+from datetime import datetime
 
-from easydict import EasyDict
+import upload
 
 
 class TestDayUpload(unittest.TestCase):
@@ -13,8 +17,6 @@ class TestDayUpload(unittest.TestCase):
     @patch("upload.MySQLRouter")
     def test_day_upload_calls_uploader(self, mock_router_cls, mock_data_upload):
         """測試 day_upload 正確呼叫對應上傳器。"""
-        import upload
-
         mock_conn = MagicMock()
         mock_router_cls.return_value.mysql_conn = mock_conn
 
@@ -23,13 +25,13 @@ class TestDayUpload(unittest.TestCase):
         mock_module.Uploader.return_value = mock_uploader
         mock_data_upload.__dict__ = {"twse": mock_module}
 
-        opt = EasyDict({
-            "host": "localhost:3306",
-            "user": "root",
-            "password": "stock",
-            "dbname": "TWSE",
-            "crawlerhost": "127.0.0.1:6738",
-        })
+        opt = SimpleNamespace(
+            host="localhost:3306",
+            user="root",
+            password="stock",
+            dbname="TWSE",
+            crawlerhost="127.0.0.1:6738",
+        )
 
         upload.day_upload("2026-01-02", opt)
 
@@ -46,8 +48,6 @@ class TestDayUpload(unittest.TestCase):
         self, mock_router_cls, mock_data_upload
     ):
         """測試 day_upload 將 dbname 轉換為小寫模組名稱。"""
-        import upload
-
         mock_conn = MagicMock()
         mock_router_cls.return_value.mysql_conn = mock_conn
 
@@ -56,84 +56,232 @@ class TestDayUpload(unittest.TestCase):
         mock_module.Uploader.return_value = mock_uploader
         mock_data_upload.__dict__ = {"tpex": mock_module}
 
-        opt = EasyDict({
-            "host": "localhost:3306",
-            "user": "root",
-            "password": "stock",
-            "dbname": "TPEX",
-            "crawlerhost": "127.0.0.1:6738",
-        })
+        opt = SimpleNamespace(
+            host="localhost:3306",
+            user="root",
+            password="stock",
+            dbname="TPEX",
+            crawlerhost="127.0.0.1:6738",
+        )
 
         upload.day_upload("2026-01-02", opt)
 
         mock_module.Uploader.assert_called_once()
 
+    @patch("upload.data_upload")
+    @patch("upload.MySQLRouter")
+    def test_day_upload_closes_on_error(
+        self, mock_router_cls, mock_data_upload
+    ):
+        """測試上傳失敗時仍歸還連線。"""
+        mock_conn = MagicMock()
+        mock_router_cls.return_value.mysql_conn = mock_conn
+
+        mock_module = MagicMock()
+        mock_module.Uploader.return_value.upload.side_effect = (
+            RuntimeError("上傳失敗")
+        )
+        mock_data_upload.__dict__ = {"twse": mock_module}
+
+        opt = SimpleNamespace(
+            host="localhost:3306",
+            user="root",
+            password="stock",
+            dbname="TWSE",
+            crawlerhost="127.0.0.1:6738",
+        )
+
+        with self.assertRaises(RuntimeError):
+            upload.day_upload("2026-01-02", opt)
+
+        mock_conn.close.assert_called_once()
+
 
 class TestMain(unittest.TestCase):
     """測試 main 函式。"""
 
-    @patch("upload.time.sleep")
-    @patch("upload.day_upload")
-    def test_main_single_date(self, mock_day_upload, mock_sleep):
+    def setUp(self):
+        """初始化測試環境。"""
+        self.opt = SimpleNamespace(
+            start_date="2026-01-02",
+            end_date="",
+            host="localhost:3306",
+            user="root",
+            password="stock",
+            dbname="TWSE",
+            crawlerhost="127.0.0.1:6738",
+        )
+        self.mock_uploader = MagicMock()
+        self.mock_module = MagicMock()
+        self.mock_module.Uploader.return_value = self.mock_uploader
+
+    @patch("upload.get_uploaded_dates", return_value=frozenset())
+    @patch("upload.data_upload")
+    @patch("upload.MySQLRouter")
+    def test_main_single_date(
+        self, mock_router_cls, mock_data_upload, mock_get_uploaded
+    ):
         """測試單日上傳。"""
-        import upload
+        mock_data_upload.__dict__ = {"twse": self.mock_module}
+        mock_conn = mock_router_cls.return_value.mysql_conn
 
-        opt = EasyDict({
-            "start_date": "2026-01-02",
-            "end_date": "",
-            "host": "localhost:3306",
-            "user": "root",
-            "password": "stock",
-            "dbname": "TWSE",
-            "crawlerhost": "127.0.0.1:6738",
-        })
+        upload.main(self.opt)
+
+        mock_get_uploaded.assert_called_once_with(
+            self.opt, "2026-01-02", "2026-01-02"
+        )
+        self.mock_module.Uploader.assert_called_once_with(
+            mock_conn, "127.0.0.1:6738"
+        )
+        self.mock_uploader.bulk_upload.assert_called_once()
+        kwargs = self.mock_uploader.bulk_upload.call_args.kwargs
+        self.assertEqual(
+            self.mock_uploader.bulk_upload.call_args.args, (["2026-01-02"],)
+        )
+        self.assertEqual(kwargs["max_workers"], 1)
+        self.assertIs(kwargs["before_crawl"].func, upload.polite_pause)
+        self.assertEqual(kwargs["before_crawl"].args, (3, 15))
+        mock_conn.close.assert_called_once()
 
-        upload.main(opt)
+    @patch("upload.get_uploaded_dates", return_value=frozenset())
+    @patch("upload.data_upload")
+    @patch("upload.MySQLRouter")
+    def test_main_date_range(
+        self, mock_router_cls, mock_data_upload, mock_get_uploaded
+    ):
+        """測試日期範圍批次上傳，並使用指定的爬取執行緒數。"""
+        mock_data_upload.__dict__ = {"twse": self.mock_module}
+        self.opt.end_date = "2026-01-04"
+        self.opt.workers = 3
+        self.opt.min_pause = 0
+        self.opt.max_pause = 0
 
-        mock_day_upload.assert_called_once_with("2026-01-02", opt)
+        upload.main(self.opt)
 
-    @patch("upload.time.sleep")
-    @patch("upload.day_upload")
-    def test_main_date_range(self, mock_day_upload, mock_sleep):
-        """測試日期範圍批次上傳。"""
-        import upload
-
-        opt = EasyDict({
-            "start_date": "2026-01-02",
-            "end_date": "2026-01-04",
-            "host": "localhost:3306",
-            "user": "root",
-            "password": "stock",
-            "dbname": "TWSE",
-            "crawlerhost": "127.0.0.1:6738",
-        })
-
-        upload.main(opt)
-
-        self.assertEqual(mock_day_upload.call_count, 3)
-        dates = [call.args[0] for call in mock_day_upload.call_args_list]
+        dates = self.mock_uploader.bulk_upload.call_args.args[0]
         self.assertEqual(dates, ["2026-01-02", "2026-01-03", "2026-01-04"])
+        kwargs = self.mock_uploader.bulk_upload.call_args.kwargs
+        self.assertEqual(kwargs["max_workers"], 3)
+        self.assertEqual(kwargs["before_crawl"].args, (0, 0))
 
-    @patch("upload.time.sleep")
-    @patch("upload.day_upload")
-    def test_main_sets_end_date_if_empty(self, mock_day_upload, mock_sleep):
+    @patch("upload.get_uploaded_dates", return_value=frozenset())
+    @patch("upload.data_upload")
+    @patch("upload.MySQLRouter")
+    def test_main_sets_end_date_if_empty(
+        self, mock_router_cls, mock_data_upload, mock_get_uploaded
+    ):
         """測試未指定 end_date 時自動設為 start_date。"""
-        import upload
-
-        opt = EasyDict({
-            "start_date": "2026-01-05",
-            "end_date": "",
-            "host": "localhost:3306",
-            "user": "root",
-            "password": "stock",
-            "dbname": "TWSE",
-            "crawlerhost": "127.0.0.1:6738",
-        })
-
-        upload.main(opt)
-
-        self.assertEqual(opt.end_date, "2026-01-05")
-        mock_day_upload.assert_called_once()
+        mock_data_upload.__dict__ = {"twse": self.mock_module}
+        self.opt.start_date = "2026-01-05"
+
+        upload.main(self.opt)
+
+        self.assertEqual(self.opt.end_date, "2026-01-05")
+        self.mock_uploader.bulk_upload.assert_called_once()
+
+    @patch("upload.get_uploaded_dates")
+    @patch("upload.data_upload")
+    @patch("upload.MySQLRouter")
+    def test_main_skips_uploaded_dates(
+        self, mock_router_cls, mock_data_upload, mock_get_uploaded
+    ):
+        """測試已上傳的日期不再爬取。"""
+        mock_data_upload.__dict__ = {"twse": self.mock_module}
+        mock_get_uploaded.return_value = frozenset(["2026-01-03"])
+        self.opt.end_date = "2026-01-04"
+
+        upload.main(self.opt)
+
+        dates = self.mock_uploader.bulk_upload.call_args.args[0]
+        self.assertEqual(dates, ["2026-01-02", "2026-01-04"])
+
+    @patch("upload.get_uploaded_dates")
+    @patch("upload.data_upload")
+    @patch("upload.MySQLRouter")
+    def test_main_all_uploaded(
+        self, mock_router_cls, mock_data_upload, mock_get_uploaded
+    ):
+        """測試範圍內皆已上傳時不建立連線。"""
+        mock_get_uploaded.return_value = frozenset(["2026-01-02"])
+
+        upload.main(self.opt)
+
+        mock_router_cls.assert_not_called()
+
+
+class TestPolitePause(unittest.TestCase):
+    """測試 polite_pause 函式。"""
+
+    @patch("upload.time.sleep")
+    @patch("upload.random.uniform", return_value=5.0)
+    def test_sleeps_random_duration(self, mock_uniform, mock_sleep):
+        """測試以 3 至 15 秒的隨機長度暫停。"""
+        upload.polite_pause()
+
+        mock_uniform.assert_called_once_with(3, 15)
+        mock_sleep.assert_called_once_with(5.0)
+
+    @patch("upload.time.sleep")
+    def test_zero_pause_skips_sleep(self, mock_sleep):
+        """測試暫停範圍皆為 0 時不呼叫 sleep。"""
+        upload.polite_pause(0, 0)
+
+        mock_sleep.assert_not_called()
+
+
+class TestConfigureLogging(unittest.TestCase):
+    """測試 configure_logging 函式。"""
+
+    def test_adds_file_handler_once(self):
+        """測試只加入一次檔案 handler，並寫入 logs/upload.log。"""
+        original = upload.logger.handlers
+        upload.logger.handlers = []
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            fake_file = os.path.join(tmp_dir, "upload.py")
+            try:
+                with patch("upload.__file__", fake_file):
+                    upload.configure_logging()
+                    upload.configure_logging()
+
+                self.assertEqual(len(upload.logger.handlers), 1)
+                self.assertTrue(os.path.exists(
+                    os.path.join(tmp_dir, "logs", "upload.log")
+                ))
+            finally:
+                for handler in upload.logger.handlers:
+                    handler.close()
+                upload.logger.handlers = original
+
+
+class TestGetUploadedDates(unittest.TestCase):
+    """測試 get_uploaded_dates 函式。"""
+
+    @patch("upload.MySQLRouter")
+    def test_returns_uploaded_dates(self, mock_router_cls):
+        """測試以單一查詢取得範圍內已上傳日期。"""
+        mock_conn = MagicMock()
+        mock_conn.execute.return_value.fetchall.return_value = [
+            (datetime(2026, 1, 2),),
+            (datetime(2026, 1, 5),),
+        ]
+        connection = mock_router_cls.return_value.connection
+        connection.return_value.__enter__.return_value = mock_conn
+        opt = SimpleNamespace(
+            host="localhost:3306",
+            user="root",
+            password="stock",
+            dbname="TWSE",
+        )
+
+        result = upload.get_uploaded_dates(opt, "2026-01-01", "2026-01-31")
+
+        self.assertEqual(result, frozenset(["2026-01-02", "2026-01-05"]))
+        mock_conn.execute.assert_called_once()
+        self.assertEqual(
+            mock_conn.execute.call_args.args[1],
+            {"start_date": "2026-01-01", "end_date": "2026-01-31"},
+        )
+        connection.return_value.__exit__.assert_called_once()
 
 
 if __name__ == "__main__":
@@ -1,20 +1,32 @@
 """Web 管理介面模組單元測試。"""
 
 import json
+import tempfile
 import unittest
+from pathlib import Path
+from datetime import date, datetime, timedelta
 from unittest.mock import patch, MagicMock, mock_open
 
 from fastapi.testclient import TestClient
 
+import DailyUpload
+import web_server
+
 
 class TestLoadConfig(unittest.TestCase):
     """測試 load_config 函式。"""
 
+    def setUp(self):
+        """每次測試前清空設定快取。"""
+        web_server.config_cache.clear()
+
+    def tearDown(self):
+        """測試後清空設定快取。"""
+        web_server.config_cache.clear()
+
     @patch("web_server.CONFIG_PATH")
     def test_load_config_file_exists(self, mock_path):
         """測試設定檔存在時正確讀取內容。"""
-        import web_server
-
         mock_path.exists.return_value = True
         config_data = {"schedule_time": "21:30"}
 
@@ -26,32 +38,47 @@ class TestLoadConfig(unittest.TestCase):
     @patch("web_server.CONFIG_PATH")
     def test_load_config_file_not_exists(self, mock_path):
         """測試設定檔不存在時回傳預設值。"""
-        import web_server
-
         mock_path.exists.return_value = False
 
         result = web_server.load_config()
 
         self.assertEqual(result, {"schedule_time": "20:07"})
 
+    @patch("web_server.CONFIG_PATH")
+    def test_load_config_reads_file_once(self, mock_path):
+        """測試重複讀取時使用快取，且回傳複本不影響快取。"""
+        mock_path.exists.return_value = True
+        m = mock_open(read_data=json.dumps({"schedule_time": "21:30"}))
+
+        with patch("builtins.open", m):
+            first = web_server.load_config()
+            first["schedule_time"] = "00:00"
+            second = web_server.load_config()
+
+        m.assert_called_once()
+        self.assertEqual(second, {"schedule_time": "21:30"})
+
 
 class TestSaveConfig(unittest.TestCase):
     """測試 save_config 函式。"""
 
+    def tearDown(self):
+        """測試後清空設定快取。"""
+        web_server.config_cache.clear()
+
     @patch("web_server.CONFIG_PATH")
     def test_save_config_writes_json(self, mock_path):
         """測試正確寫入 JSON 設定檔。"""
-        import web_server
-
         m = mock_open()
         with patch("builtins.open", m):
             web_server.save_config({"schedule_time": "22:00"})
 
-        m.assert_called_once_with(mock_path, "w", encoding="utf-8")
-        written = "".join(
+        m.assert_called_once_with(mock_path, "wb")
+        written = b"".join(
             call.args[0] for call in m().write.call_args_list
         )
-        self.assertIn("22:00", written)
+        self.assertEqual(json.loads(written), {"schedule_time": "22:00"})
+        self.assertEqual(web_server.load_config(), {"schedule_time": "22:00"})
 
 
 class TestSetupSchedule(unittest.TestCase):
@@ -60,8 +87,6 @@ class TestSetupSchedule(unittest.TestCase):
     @patch("web_server.schedule_lib")
     def test_setup_schedule_clears_and_sets(self, mock_schedule):
         """測試設定排程時先清除再建立新排程。"""
-        import web_server
-
         web_server.setup_schedule("18:00")
 
         mock_schedule.clear.assert_called_once()
@@ -69,24 +94,139 @@ class TestSetupSchedule(unittest.TestCase):
             "18:00"
         )
 
+    @patch("web_server.schedule_lib")
+    def test_setup_schedule_wakes_scheduler(self, mock_schedule):
+        """測試設定排程後喚醒排程執行緒。"""
+        web_server.schedule_wakeup.clear()
+
+        web_server.setup_schedule("18:00")
+
+        self.assertTrue(web_server.schedule_wakeup.is_set())
+
+
+class TestSchedulerThread(unittest.TestCase):
+    """測試 scheduler_thread 函式。"""
+
+    @patch("web_server.schedule_wakeup")
+    @patch("web_server.schedule_lib")
+    def test_runs_due_jobs_outside_lock(self, mock_schedule, mock_wakeup):
+        """測試到期任務在未持有 schedule_lock 時執行，並休眠至下次排程。"""
+        lock_held = []
+        due_job = MagicMock(should_run=True)
+        due_job.run.side_effect = lambda: lock_held.append(
+            web_server.schedule_lock.locked()
+        )
+        idle_job = MagicMock(should_run=False)
+        mock_schedule.get_jobs.return_value = [due_job, idle_job]
+        mock_schedule.idle_seconds.return_value = 120
+        mock_wakeup.wait.side_effect = SystemExit
+
+        with self.assertRaises(SystemExit):
+            web_server.scheduler_thread()
+
+        self.assertEqual(lock_held, [False])
+        idle_job.run.assert_not_called()
+        mock_wakeup.wait.assert_called_once_with(timeout=120)
+
+
+class TestNewJobId(unittest.TestCase):
+    """測試 new_job_id 函式。"""
+
+    @patch("web_server.time.time", return_value=1767225600)
+    def test_ids_unique_within_same_second(self, mock_time):
+        """測試同一秒內產生的任務 ID 不重複。"""
+        ids = {web_server.new_job_id() for _ in range(100)}
+
+        self.assertEqual(len(ids), 100)
+
+
+class TestPruneUploadJobs(unittest.TestCase):
+    """測試 prune_upload_jobs 函式。"""
+
+    def setUp(self):
+        """每次測試前清空任務清單。"""
+        web_server.upload_jobs.clear()
+
+    def tearDown(self):
+        """測試後清空任務清單。"""
+        web_server.upload_jobs.clear()
+
+    @patch("web_server.MAX_UPLOAD_JOBS", 2)
+    def test_evicts_oldest_finished_jobs(self):
+        """測試超過上限時依序移除已結束任務，保留執行中任務。"""
+        for job_id, status in [
+            ("a", "running"), ("b", "completed"), ("c", "failed"),
+            ("d", "completed"),
+        ]:
+            web_server.upload_jobs[job_id] = {"job_id": job_id, "status": status}
+
+        web_server.prune_upload_jobs()
+
+        self.assertEqual(list(web_server.upload_jobs), ["a", "d"])
+
+    def test_evicts_jobs_finished_before_retention(self):
+        """測試移除結束超過保留期限的任務，保留近期與執行中任務。"""
+        old = (datetime.now() - timedelta(days=2)).isoformat()
+        recent = datetime.now().isoformat()
+        web_server.upload_jobs.update({
+            "a": {"status": "completed", "finished_at": old},
+            "b": {"status": "failed", "finished_at": recent},
+            "c": {"status": "running", "finished_at": None},
+        })
+
+        web_server.prune_upload_jobs()
+
+        self.assertEqual(list(web_server.upload_jobs), ["b", "c"])
+
+    @patch("web_server.MAX_UPLOAD_JOBS", 2)
+    def test_keeps_jobs_within_limit(self):
+        """測試未超過上限時不移除任務。"""
+        web_server.upload_jobs["a"] = {"job_id": "a", "status": "completed"}
+
+        web_server.prune_upload_jobs()
+
+        self.assertEqual(list(web_server.upload_jobs), ["a"])
+
 
 class TestRunUploadJob(unittest.TestCase):
     """測試 run_upload_job 函式。"""
 
+    @patch("web_server.upload_db_dates")
+    @patch("web_server.ThreadPoolExecutor")
+    def test_worker_count_capped(self, mock_pool, mock_upload_db_dates):
+        """測試平行上傳的執行緒數不超過 MAX_DB_WORKERS。"""
+        job_id = "test-cap"
+        web_server.upload_jobs[job_id] = {
+            "job_id": job_id,
+            "status": "pending",
+            "errors": [],
+            "finished_at": None,
+        }
+
+        web_server.run_upload_job(
+            job_id, "2026-01-02", "2026-01-02",
+            ["TWSE", "TPEX", "TAIFEX", "FAOI", "MGTS"],
+        )
+
+        mock_pool.assert_called_once_with(
+            max_workers=web_server.MAX_DB_WORKERS
+        )
+        self.assertEqual(
+            mock_pool.return_value.__enter__.return_value.submit.call_count, 5
+        )
+        web_server.upload_jobs.pop(job_id)
+
     @patch("web_server.day_upload")
     @patch("web_server.time.sleep")
     def test_single_date_single_db(self, mock_sleep, mock_day_upload):
         """測試單日單資料庫上傳任務。"""
-        import web_server
-
         job_id = "test-001"
         web_server.upload_jobs[job_id] = {
             "job_id": job_id,
             "status": "pending",
             "total": 0,
             "completed": 0,
-            "current_date": "",
-            "current_db": "",
+            "progress": {},
             "errors": [],
             "finished_at": None,
         }
@@ -97,6 +237,7 @@ class TestRunUploadJob(unittest.TestCase):
         self.assertEqual(web_server.upload_jobs[job_id]["status"], "completed")
         self.assertEqual(web_server.upload_jobs[job_id]["completed"], 1)
         self.assertEqual(web_server.upload_jobs[job_id]["total"], 1)
+        self.assertNotIn(job_id, web_server.running_job_ids)
 
         del web_server.upload_jobs[job_id]
 
@@ -104,16 +245,13 @@ class TestRunUploadJob(unittest.TestCase):
     @patch("web_server.time.sleep")
     def test_date_range_multiple_dbs(self, mock_sleep, mock_day_upload):
         """測試日期範圍與多資料庫上傳任務。"""
-        import web_server
-
         job_id = "test-002"
         web_server.upload_jobs[job_id] = {
             "job_id": job_id,
             "status": "pending",
             "total": 0,
             "completed": 0,
-            "current_date": "",
-            "current_db": "",
+            "progress": {},
             "errors": [],
             "finished_at": None,
         }
@@ -126,6 +264,11 @@ class TestRunUploadJob(unittest.TestCase):
         self.assertEqual(mock_day_upload.call_count, 4)
         self.assertEqual(web_server.upload_jobs[job_id]["completed"], 4)
         self.assertEqual(web_server.upload_jobs[job_id]["status"], "completed")
+        # 各資料庫分別記錄目前日期，平行上傳時不互相覆寫
+        self.assertEqual(
+            web_server.upload_jobs[job_id]["progress"],
+            {"TWSE": "2026-01-03", "TPEX": "2026-01-03"},
+        )
 
         del web_server.upload_jobs[job_id]
 
@@ -133,16 +276,13 @@ class TestRunUploadJob(unittest.TestCase):
     @patch("web_server.time.sleep")
     def test_upload_error_recorded(self, mock_sleep, mock_day_upload):
         """測試上傳失敗時錯誤被記錄。"""
-        import web_server
-
         job_id = "test-003"
         web_server.upload_jobs[job_id] = {
             "job_id": job_id,
             "status": "pending",
             "total": 0,
             "completed": 0,
-            "current_date": "",
-            "current_db": "",
+            "progress": {},
             "errors": [],
             "finished_at": None,
         }
@@ -156,19 +296,43 @@ class TestRunUploadJob(unittest.TestCase):
         del web_server.upload_jobs[job_id]
 
 
+class TestUploadDbDates(unittest.TestCase):
+    """測試 upload_db_dates 函式。"""
+
+    @patch("web_server.crawler_rate_limiter")
+    @patch("web_server.day_upload")
+    def test_uploads_dates_in_order(self, mock_day_upload, rate_limiter):
+        """測試同一資料庫依日期順序上傳，並經由共用速率限制器排隊。"""
+        job = {"completed": 0, "progress": {}, "errors": []}
+
+        web_server.upload_db_dates(job, "TPEX", date(2026, 1, 30), 3)
+
+        dates = [c.args[0] for c in mock_day_upload.call_args_list]
+        self.assertEqual(dates, ["2026-01-30", "2026-01-31", "2026-02-01"])
+        self.assertEqual(mock_day_upload.call_args.args[1].dbname, "TPEX")
+        self.assertEqual(job["completed"], 3)
+        self.assertEqual(job["progress"], {"TPEX": "2026-02-01"})
+        self.assertEqual(rate_limiter.acquire.call_count, 3)
+
+    def test_shares_rate_limiter_with_daily_upload(self):
+        """測試手動上傳與每日排程共用同一速率限制器。"""
+        self.assertIs(
+            web_server.crawler_rate_limiter, DailyUpload.crawler_rate_limiter
+        )
+
+
 class TestAPIEndpoints(unittest.TestCase):
     """測試 API 端點。"""
 
     @classmethod
     def setUpClass(cls):
         """建立測試用 FastAPI TestClient。"""
-        import web_server
         cls.client = TestClient(web_server.app)
 
     def setUp(self):
         """每次測試前清空任務清單。"""
-        import web_server
         web_server.upload_jobs.clear()
+        web_server.running_job_ids.clear()
 
     def test_get_databases(self):
         """測試取得資料庫清單。"""
@@ -225,11 +389,18 @@ class TestAPIEndpoints(unittest.TestCase):
 
         self.assertEqual(res.status_code, 400)
 
-    @patch("web_server.threading.Thread")
-    def test_create_upload_success(self, mock_thread):
-        """測試成功建立上傳任務。"""
-        mock_thread.return_value.start = MagicMock()
+    def test_update_schedule_requires_two_digit_fields(self):
+        """測試非 HH:MM 的時間格式被拒絕。"""
+        res = self.client.put(
+            "/api/schedule",
+            json={"time": "9:5"},
+        )
+
+        self.assertEqual(res.status_code, 400)
 
+    @patch("web_server.job_executor")
+    def test_create_upload_success(self, mock_executor):
+        """測試成功建立上傳任務。"""
         res = self.client.post(
             "/api/upload",
             json={
@@ -243,6 +414,28 @@ class TestAPIEndpoints(unittest.TestCase):
         data = res.json()
         self.assertIn("job_id", data)
         self.assertEqual(data["status"], "pending")
+        mock_executor.submit.assert_called_once_with(
+            web_server.run_upload_job, data["job_id"],
+            "2026-01-02", "2026-01-02", ["TWSE"],
+        )
+
+    @patch("web_server.job_executor")
+    def test_create_upload_deduplicates_databases(self, mock_executor):
+        """測試重複的資料庫只提交一次。"""
+        res = self.client.post(
+            "/api/upload",
+            json={
+                "start_date": "2026-01-02",
+                "end_date": "2026-01-02",
+                "databases": ["TWSE", "TPEX", "TWSE"],
+            },
+        )
+
+        self.assertEqual(res.status_code, 200)
+        mock_executor.submit.assert_called_once_with(
+            web_server.run_upload_job, res.json()["job_id"],
+            "2026-01-02", "2026-01-02", ["TWSE", "TPEX"],
+        )
 
     def test_create_upload_empty_databases(self):
         """測試未選擇資料庫時被拒絕。"""
@@ -283,6 +476,19 @@ class TestAPIEndpoints(unittest.TestCase):
 
         self.assertEqual(res.status_code, 400)
 
+    def test_create_upload_rejects_non_calendar_date(self):
+        """測試格式正確但不存在的日期被拒絕。"""
+        res = self.client.post(
+            "/api/upload",
+            json={
+                "start_date": "2026-02-30",
+                "end_date": "2026-03-02",
+                "databases": ["TWSE"],
+            },
+        )
+
+        self.assertEqual(res.status_code, 400)
+
     def test_create_upload_end_before_start(self):
         """測試結束日期早於起始日期被拒絕。"""
         res = self.client.post(
@@ -296,17 +502,14 @@ class TestAPIEndpoints(unittest.TestCase):
 
         self.assertEqual(res.status_code, 400)
 
-    @patch("web_server.threading.Thread")
-    def test_create_upload_rejects_when_running(self, mock_thread):
+    @patch("web_server.job_executor")
+    def test_create_upload_rejects_when_running(self, mock_executor):
         """測試已有執行中任務時拒絕新任務。"""
-        import web_server
-
-        mock_thread.return_value.start = MagicMock()
-
         web_server.upload_jobs["existing"] = {
             "job_id": "existing",
             "status": "running",
         }
+        web_server.running_job_ids.add("existing")
 
         res = self.client.post(
             "/api/upload",
@@ -326,13 +529,9 @@ class TestAPIEndpoints(unittest.TestCase):
         self.assertEqual(res.status_code, 200)
         self.assertEqual(res.json(), [])
 
-    @patch("web_server.threading.Thread")
-    def test_list_upload_jobs_with_data(self, mock_thread):
+    @patch("web_server.job_executor")
+    def test_list_upload_jobs_with_data(self, mock_executor):
         """測試有任務時回傳任務清單。"""
-        import web_server
-
-        mock_thread.return_value.start = MagicMock()
-
         self.client.post(
             "/api/upload",
             json={
@@ -353,13 +552,9 @@ class TestAPIEndpoints(unittest.TestCase):
 
         self.assertEqual(res.status_code, 404)
 
-    @patch("web_server.threading.Thread")
-    def test_get_upload_status_found(self, mock_thread):
+    @patch("web_server.job_executor")
+    def test_get_upload_status_found(self, mock_executor):
         """測試查詢已存在的任務回傳正確狀態。"""
-        import web_server
-
-        mock_thread.return_value.start = MagicMock()
-
         create_res = self.client.post(
             "/api/upload",
             json={
@@ -376,5 +571,49 @@ class TestAPIEndpoints(unittest.TestCase):
         self.assertEqual(res.json()["job_id"], job_id)
 
 
+class TestServeFrontend(unittest.TestCase):
+    """測試前端頁面服務。"""
+
+    @classmethod
+    def setUpClass(cls):
+        """建立測試用 FastAPI TestClient。"""
+        cls.client = TestClient(web_server.app)
+
+    def setUp(self):
+        """建立含 index.html 的暫存靜態資料夾。"""
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        static_dir = Path(tmp.name)
+        (static_dir / "index.html").write_text("<html>app</html>")
+
+        for name, value in [
+            ("STATIC_DIR", static_dir),
+            ("STATIC_ROOT", static_dir.resolve()),
+            ("INDEX_FILE", static_dir / "index.html"),
+        ]:
+            patcher = patch(f"web_server.{name}", value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+        web_server.index_cache.clear()
+        self.addCleanup(web_server.index_cache.clear)
+
+    def test_spa_fallback_serves_index_with_etag(self):
+        """測試未知路徑回傳 index.html 並附帶 ETag。"""
+        res = self.client.get("/some/route")
+
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(res.text, "<html>app</html>")
+        self.assertIn("ETag", res.headers)
+
+    def test_spa_fallback_not_modified(self):
+        """測試 If-None-Match 符合時回傳 304。"""
+        etag = self.client.get("/").headers["ETag"]
+
+        res = self.client.get("/other", headers={"If-None-Match": etag})
+
+        self.assertEqual(res.status_code, 304)
+
+
 if __name__ == "__main__":
     unittest.main()
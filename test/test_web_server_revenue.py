@@ -5,6 +5,8 @@ from unittest.mock import patch, MagicMock
 
 from fastapi.testclient import TestClient
 
+import web_server
+
 
 class TestQuarterRevenueAPI(unittest.TestCase):
     """測試季度營業收入 API 端點。"""
@@ -12,19 +14,17 @@ class TestQuarterRevenueAPI(unittest.TestCase):
     @classmethod
     def setUpClass(cls):
         """建立測試用 FastAPI TestClient。"""
-        import web_server
         cls.client = TestClient(web_server.app)
 
     def setUp(self):
         """每次測試前清空任務清單。"""
-        import web_server
         web_server.upload_jobs.clear()
+        web_server.running_job_ids.clear()
+        web_server.quarter_table_ready.clear()
 
-    @patch("web_server.threading.Thread")
-    def test_create_quarter_revenue_upload_success(self, mock_thread):
+    @patch("web_server.job_executor")
+    def test_create_quarter_revenue_upload_success(self, mock_executor):
         """測試成功建立季度營業收入抓取任務。"""
-        mock_thread.return_value.start = MagicMock()
-
         res = self.client.post(
             "/api/quarter-revenue/upload",
             json={"year": 113, "season": 1},
@@ -71,17 +71,14 @@ class TestQuarterRevenueAPI(unittest.TestCase):
 
         self.assertEqual(res.status_code, 400)
 
-    @patch("web_server.threading.Thread")
-    def test_rejects_when_running(self, mock_thread):
+    @patch("web_server.job_executor")
+    def test_rejects_when_running(self, mock_executor):
         """測試已有執行中任務時拒絕新任務。"""
-        import web_server
-
-        mock_thread.return_value.start = MagicMock()
-
         web_server.upload_jobs["existing"] = {
             "job_id": "existing",
             "status": "running",
         }
+        web_server.running_job_ids.add("existing")
 
         res = self.client.post(
             "/api/quarter-revenue/upload",
@@ -96,7 +93,8 @@ class TestQuarterRevenueAPI(unittest.TestCase):
         from datetime import datetime
 
         mock_conn = MagicMock()
-        mock_router_cls.return_value.mysql_conn = mock_conn
+        connection = mock_router_cls.return_value.connection
+        connection.return_value.__enter__.return_value = mock_conn
 
         mock_uploaded_at = datetime(2026, 1, 15, 10, 30, 0)
         mock_conn.execute.return_value.fetchall.return_value = [
@@ -112,12 +110,31 @@ class TestQuarterRevenueAPI(unittest.TestCase):
         self.assertEqual(data["uploaded"][0]["year"], 113)
         self.assertEqual(data["uploaded"][0]["season"], 1)
         self.assertEqual(data["uploaded"][0]["record_count"], 1234)
+        connection.return_value.__exit__.assert_called_once()
+
+    @patch("web_server.MySQLRouter")
+    def test_list_uploaded_quarters_checks_table_once(self, mock_router_cls):
+        """測試資料表結構只在第一次查詢時檢查。"""
+        mock_conn = MagicMock()
+        connection = mock_router_cls.return_value.connection
+        connection.return_value.__enter__.return_value = mock_conn
+        mock_conn.execute.return_value.fetchall.return_value = []
+
+        self.client.get("/api/quarter-revenue/uploaded")
+        first_calls = mock_conn.execute.call_count
+        mock_conn.execute.reset_mock()
+        self.client.get("/api/quarter-revenue/uploaded")
+
+        self.assertGreater(first_calls, 1)
+        mock_conn.execute.assert_called_once()
+        self.assertIn("SELECT", str(mock_conn.execute.call_args.args[0]))
 
     @patch("web_server.MySQLRouter")
     def test_list_uploaded_quarters_empty(self, mock_router_cls):
         """測試無已上傳記錄時回傳空清單。"""
         mock_conn = MagicMock()
-        mock_router_cls.return_value.mysql_conn = mock_conn
+        connection = mock_router_cls.return_value.connection
+        connection.return_value.__enter__.return_value = mock_conn
         mock_conn.execute.return_value.fetchall.return_value = []
 
         res = self.client.get("/api/quarter-revenue/uploaded")
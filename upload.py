@@ -4,26 +4,36 @@ import os
 import time
 import random
 import argparse
+import functools
 import logging
 
-from datetime import datetime, timedelta
+import pandas as pd
+from sqlalchemy import text
 
 import data_upload
 from routers import MySQLRouter
 
-# 設定 logging，輸出至 logs/ 資料夾
-log_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), "logs")
-os.makedirs(log_dir, exist_ok=True)
-
-log_formatter = logging.Formatter(
-    "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
-)
-log_handler = logging.FileHandler(os.path.join(log_dir, "upload.log"))
-log_handler.setFormatter(log_formatter)
-
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.INFO)
-logger.addHandler(log_handler)
+
+
+def configure_logging():
+    """設定 logging，輸出至 logs/upload.log。
+
+    由執行入口呼叫，匯入本模組不會建立檔案；重複呼叫不會重複加入 handler。
+    """
+    if any(isinstance(h, logging.FileHandler) for h in logger.handlers):
+        return
+
+    log_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), "logs")
+    os.makedirs(log_dir, exist_ok=True)
+
+    log_formatter = logging.Formatter(
+        "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+    )
+    log_handler = logging.FileHandler(os.path.join(log_dir, "upload.log"))
+    log_handler.setFormatter(log_formatter)
+    logger.addHandler(log_handler)
 
 
 def day_upload(date, opt):
@@ -31,7 +41,7 @@ def day_upload(date, opt):
 
     Args:
         date (str): 日期字串，格式為 YYYY-MM-DD。
-        opt (argparse.Namespace | EasyDict): 命令列參數，包含以下屬性：
+        opt (argparse.Namespace | SimpleNamespace): 命令列參數，包含以下屬性：
             - host (str): MySQL 主機位址。
             - user (str): MySQL 使用者名稱。
             - password (str): MySQL 密碼。
@@ -44,18 +54,62 @@ def day_upload(date, opt):
     DBNAME = opt.dbname
     CRAWLERHOST = opt.crawlerhost
 
-    logger.info(f"連線至 MySQL 資料庫 {DBNAME}，主機 {HOST}，使用者 {USER}")
+    logger.info(
+        "連線至 MySQL 資料庫 %s，主機 %s，使用者 %s", DBNAME, HOST, USER
+    )
     conn = MySQLRouter(HOST, USER, PASSWORD, DBNAME).mysql_conn
     package_name = DBNAME.lower()
 
-    logger.info(f"上傳資料：模組 {package_name}，日期 {date}")
-    uploader = data_upload.__dict__[package_name].Uploader(conn, CRAWLERHOST)
-    uploader.upload(date)
-    conn.close()
+    logger.info("上傳資料：模組 %s，日期 %s", package_name, date)
+    try:
+        uploader = data_upload.__dict__[package_name].Uploader(
+            conn, CRAWLERHOST
+        )
+        uploader.upload(date)
+    finally:
+        conn.close()
 
     logger.info("資料上傳完成。")
 
 
+def polite_pause(min_pause=3, max_pause=15):
+    """每次爬取前隨機暫停，避免對爬蟲服務造成負擔。
+
+    Args:
+        min_pause (float): 暫停秒數下限，預設為 3。
+        max_pause (float): 暫停秒數上限，預設為 15，與下限皆為 0 時不暫停。
+    """
+    pause_duration = random.uniform(min_pause, max_pause)
+    if pause_duration <= 0:
+        return
+    logger.info("暫停 %.1f 秒後爬取資料", pause_duration)
+    time.sleep(pause_duration)
+
+
+def get_uploaded_dates(opt, start_date, end_date):
+    """一次查詢日期範圍內已上傳的日期。
+
+    Args:
+        opt (argparse.Namespace | SimpleNamespace): 命令列參數，包含連線資訊。
+        start_date (str): 起始日期，格式為 YYYY-MM-DD。
+        end_date (str): 結束日期，格式為 YYYY-MM-DD。
+
+    Returns:
+        frozenset[str]: 已上傳的日期集合，格式為 YYYY-MM-DD。
+    """
+    router = MySQLRouter(opt.host, opt.user, opt.password, opt.dbname)
+    with router.connection() as conn:
+        rows = conn.execute(
+            text(
+                "SELECT Date FROM UploadDate "
+                "WHERE Date BETWEEN :start_date AND :end_date"
+            ),
+            {"start_date": start_date, "end_date": end_date},
+        ).fetchall()
+
+    return frozenset(row[0].strftime("%Y-%m-%d") for row in rows)
+
+
 def main(opt):
     """主函式，處理命令列參數並執行批次上傳。
 
@@ -68,21 +122,42 @@ def main(opt):
     start_date = opt.start_date
     end_date = opt.end_date
 
-    logger.info(f"開始上傳，日期範圍 {start_date} 至 {end_date}")
+    logger.info("開始上傳，日期範圍 %s 至 %s", start_date, end_date)
 
-    start_dt = datetime.strptime(start_date, "%Y-%m-%d")
-    end_dt = datetime.strptime(end_date, "%Y-%m-%d")
+    # 一次取得範圍內已上傳日期，已上傳的日期不需暫停與逐日查詢
+    uploaded_dates = get_uploaded_dates(opt, start_date, end_date)
 
-    current_dt = start_dt
-    while current_dt <= end_dt:
-        pause_duration = random.uniform(3, 15)
-        logger.info(
-            f"暫停 {pause_duration:.1f} 秒後處理日期：{current_dt.strftime('%Y-%m-%d')}"
+    dates = pd.date_range(start_date, end_date, freq="D").strftime("%Y-%m-%d")
+
+    pending_dates = []
+    for date_str in dates:
+        if date_str in uploaded_dates:
+            logger.info("日期 %s 的資料已存在於資料庫中，跳過上傳。", date_str)
+        else:
+            pending_dates.append(date_str)
+
+    if not pending_dates:
+        return
+
+    conn = MySQLRouter(opt.host, opt.user, opt.password, opt.dbname).mysql_conn
+    package_name = opt.dbname.lower()
+    try:
+        uploader = data_upload.__dict__[package_name].Uploader(
+            conn, opt.crawlerhost
+        )
+        uploader.bulk_upload(
+            pending_dates,
+            max_workers=getattr(opt, "workers", 1),
+            before_crawl=functools.partial(
+                polite_pause,
+                getattr(opt, "min_pause", 3),
+                getattr(opt, "max_pause", 15),
+            ),
         )
-        time.sleep(pause_duration)
-        date_str = current_dt.strftime("%Y-%m-%d")
-        day_upload(date_str, opt)
-        current_dt += timedelta(days=1)
+    finally:
+        conn.close()
+
+    logger.info("資料上傳完成。")
 
 
 if __name__ == "__main__":
@@ -119,6 +194,19 @@ if __name__ == "__main__":
         "--crawlerhost", type=str, default="tw_stocker_crawler:6738",
         help="爬蟲服務主機位址"
     )
+    parser.add_argument(
+        "--workers", type=int, default=1,
+        help="同時爬取的日期數"
+    )
+    parser.add_argument(
+        "--min_pause", type=float, default=3,
+        help="每次爬取前暫停秒數下限"
+    )
+    parser.add_argument(
+        "--max_pause", type=float, default=15,
+        help="每次爬取前暫停秒數上限，與下限皆設為 0 時不暫停"
+    )
     opt = parser.parse_args()
 
+    configure_logging()
     main(opt)
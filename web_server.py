@@ -5,24 +5,29 @@
 """
 
 import os
-import json
-import uuid
+import re
 import time
-import random
+import hashlib
+import itertools
 import threading
 import logging
 from datetime import datetime, timedelta
 from pathlib import Path
+from types import SimpleNamespace
 from contextlib import asynccontextmanager
+from concurrent.futures import ThreadPoolExecutor
 
+import orjson
 import schedule as schedule_lib
-from fastapi import FastAPI, HTTPException
-from fastapi.responses import FileResponse
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import FileResponse, Response
 from pydantic import BaseModel
-from easydict import EasyDict
 from sqlalchemy import text
 
-from DailyUpload import daily_craw, DB_NAMES, HOST, USER, PASSWORD, CRAWLERHOST
+from DailyUpload import (
+    daily_craw, crawler_semaphore, crawler_rate_limiter, DB_NAMES, HOST,
+    USER, PASSWORD, CRAWLERHOST,
+)
 from upload import day_upload
 from data_upload.quarter_revenue import QuarterRevenueUploader
 from routers import MySQLRouter
@@ -30,6 +35,11 @@ from routers import MySQLRouter
 # 路徑設定
 BASE_DIR = Path(__file__).parent
 STATIC_DIR = BASE_DIR / "static"
+# 靜態檔案根目錄的實際路徑，供路徑穿越檢查使用
+STATIC_ROOT = STATIC_DIR.resolve()
+INDEX_FILE = STATIC_DIR / "index.html"
+# index.html 內容快取，檔案修改時間變更時重新讀取
+index_cache: dict = {}
 LOG_DIR = BASE_DIR / "logs"
 CONFIG_PATH = LOG_DIR / "config.json"
 
@@ -50,34 +60,122 @@ logger.setLevel(logging.INFO)
 logger.addHandler(file_handler)
 logger.addHandler(console_handler)
 
-# 上傳任務追蹤
+# 可上傳的資料庫名稱，供請求驗證使用
+ALLOWED_DATABASES = frozenset(DB_NAMES)
+# /api/databases 的回應內容固定，於匯入時序列化一次
+DATABASES_JSON = orjson.dumps({"databases": DB_NAMES})
+
+# 排程時間 HH:MM 與日期 YYYY-MM-DD 格式
+TIME_PATTERN = re.compile(r"([01]\d|2[0-3]):[0-5]\d")
+DATE_PATTERN = re.compile(r"\d{4}-\d{2}-\d{2}")
+
+# 上傳任務追蹤，移除結束過久或超過上限的已結束任務
+MAX_UPLOAD_JOBS = 500
+JOB_RETENTION = timedelta(hours=24)
+FINISHED_STATUSES = ("completed", "failed")
+# 單一任務內平行上傳的資料庫數上限
+MAX_DB_WORKERS = 4
 upload_jobs: dict[str, dict] = {}
+job_id_counter = itertools.count(1)
+# 狀態為 running 的任務 ID，與 upload_jobs 同受 jobs_lock 保護
+running_job_ids: set[str] = set()
 jobs_lock = threading.Lock()
 
+# 設定檔快取，由 load_config 與 save_config 維護
+config_cache: dict = {}
+config_lock = threading.Lock()
+
+# QuarterRevenueUploaded 資料表結構已確認，查詢時不需再檢查
+quarter_table_ready = threading.Event()
+LIST_UPLOADED_QUARTERS_SQL = text(
+    "SELECT Year, Season, UploadedAt, RecordCount "
+    "FROM QuarterRevenueUploaded "
+    "ORDER BY Year DESC, Season DESC"
+)
+
+# 背景任務執行緒池，重複使用執行緒並依序執行任務
+job_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="upload-job")
+
 # 排程管理
 schedule_lock = threading.Lock()
+# 排程變更時喚醒排程執行緒重新計算休眠時間
+schedule_wakeup = threading.Event()
+# 無排程任務時的最長休眠秒數
+SCHEDULER_IDLE_TIMEOUT = 60
+
+
+def prune_upload_jobs():
+    """移除已結束的舊任務。
+
+    先移除結束超過 JOB_RETENTION 的任務；任務數仍超過 MAX_UPLOAD_JOBS
+    時，再依建立順序移除已結束的任務。呼叫端須持有 jobs_lock；
+    待處理與執行中的任務不會被移除。
+    """
+    finished = [
+        job_id for job_id, job in upload_jobs.items()
+        if job["status"] in FINISHED_STATUSES
+    ]
+
+    # finished_at 為同格式的 ISO 字串，可直接依字串比較先後
+    cutoff = (datetime.now() - JOB_RETENTION).isoformat()
+    expired = []
+    kept = []
+    for job_id in finished:
+        finished_at = upload_jobs[job_id].get("finished_at")
+        if finished_at and finished_at < cutoff:
+            expired.append(job_id)
+        else:
+            kept.append(job_id)
+
+    excess = len(upload_jobs) - len(expired) - MAX_UPLOAD_JOBS
+    if excess > 0:
+        expired.extend(kept[:excess])
+
+    for job_id in expired:
+        del upload_jobs[job_id]
+
+
+def new_job_id():
+    """產生任務 ID。
+
+    由秒級時間戳記與行程內遞增序號組成，同一行程內不會重複。
+
+    Returns:
+        str: 十六進位的任務 ID。
+    """
+    return f"{int(time.time()):08x}{next(job_id_counter):04x}"
 
 
 def load_config():
     """讀取設定檔。
 
+    首次呼叫時讀取檔案並快取，之後直接回傳快取內容；
+    設定檔僅由 save_config 寫入，寫入時同步更新快取。
+
     Returns:
-        dict: 設定內容，包含 schedule_time 欄位。
+        dict: 設定內容的複本，包含 schedule_time 欄位。
     """
-    if CONFIG_PATH.exists():
-        with open(CONFIG_PATH, "r", encoding="utf-8") as f:
-            return json.load(f)
-    return {"schedule_time": "20:07"}
+    with config_lock:
+        if not config_cache:
+            if CONFIG_PATH.exists():
+                with open(CONFIG_PATH, "rb") as f:
+                    config_cache.update(orjson.loads(f.read()))
+            else:
+                config_cache.update({"schedule_time": "20:07"})
+        return dict(config_cache)
 
 
 def save_config(config):
-    """儲存設定檔。
+    """儲存設定檔並更新快取。
 
     Args:
         config (dict): 設定內容。
     """
-    with open(CONFIG_PATH, "w", encoding="utf-8") as f:
-        json.dump(config, f, indent=2, ensure_ascii=False)
+    with config_lock:
+        with open(CONFIG_PATH, "wb") as f:
+            f.write(orjson.dumps(config, option=orjson.OPT_INDENT_2))
+        config_cache.clear()
+        config_cache.update(config)
 
 
 def setup_schedule(schedule_time):
@@ -90,84 +188,131 @@ def setup_schedule(schedule_time):
         schedule_lib.clear()
         schedule_lib.every().day.at(schedule_time).do(daily_craw)
         logger.info("排程已設定為每日 %s", schedule_time)
+    schedule_wakeup.set()
 
 
 def scheduler_thread():
-    """排程執行緒，持續檢查並執行待處理的排程任務。"""
+    """排程執行緒，執行待處理的排程任務後休眠至下一次排程時間。
+
+    到期任務在 schedule_lock 外執行，補抓期間仍可更新排程時間；
+    排程經 setup_schedule 變更時會被提前喚醒。
+    """
     while True:
+        schedule_wakeup.clear()
         with schedule_lock:
-            schedule_lib.run_pending()
-        time.sleep(1)
+            due_jobs = [
+                job for job in schedule_lib.get_jobs() if job.should_run
+            ]
+
+        for job in due_jobs:
+            job.run()
+
+        with schedule_lock:
+            idle = schedule_lib.idle_seconds()
+
+        if idle is None:
+            idle = SCHEDULER_IDLE_TIMEOUT
+        schedule_wakeup.wait(timeout=max(1, idle))
+
+
+def upload_db_dates(job, db_name, start_dt, total_days):
+    """依日期順序上傳單一資料庫的日期範圍，並回報任務進度。
+
+    各資料庫的目前日期分別記錄於 job["progress"][db_name]，
+    平行上傳時不互相覆寫。
+
+    由 run_upload_job 對各資料庫平行呼叫；每次上傳前經由與每日排程共用的
+    速率限制器排隊，並取得爬蟲服務的併發名額。
+
+    Args:
+        job (dict): 任務狀態。
+        db_name (str): 資料庫名稱。
+        start_dt (datetime.date): 起始日期。
+        total_days (int): 上傳的日數。
+    """
+    opt = SimpleNamespace(
+        host=HOST,
+        user=USER,
+        password=PASSWORD,
+        dbname=db_name,
+        crawlerhost=CRAWLERHOST,
+    )
+
+    # 逐日產生日期字串，不預先建立整段日期清單
+    for offset in range(total_days):
+        date = (start_dt + timedelta(days=offset)).isoformat()
+        # 前一日的完成數與目前進度一併更新，每日只取得一次鎖
+        with jobs_lock:
+            if offset:
+                job["completed"] += 1
+            job["progress"][db_name] = date
+
+        try:
+            crawler_rate_limiter.acquire()
+            with crawler_semaphore:
+                day_upload(date, opt)
+        except Exception as e:
+            logger.error("上傳失敗 %s %s: %s", db_name, date, e)
+            with jobs_lock:
+                job["errors"].append(f"{db_name} {date}: {str(e)}")
+
+    if total_days:
+        with jobs_lock:
+            job["completed"] += 1
 
 
 def run_upload_job(job_id, start_date, end_date, databases):
     """執行上傳任務（背景執行緒）。
 
+    各資料庫的日期範圍平行上傳，同一資料庫內依日期順序上傳。
+
     Args:
         job_id (str): 任務 ID。
         start_date (str): 起始日期，格式為 YYYY-MM-DD。
         end_date (str): 結束日期，格式為 YYYY-MM-DD。
         databases (list[str]): 資料庫名稱清單。
     """
-    start_dt = datetime.strptime(start_date, "%Y-%m-%d")
-    end_dt = datetime.strptime(end_date, "%Y-%m-%d")
+    start_dt = datetime.fromisoformat(start_date).date()
+    end_dt = datetime.fromisoformat(end_date).date()
 
-    dates = []
-    current = start_dt
-    while current <= end_dt:
-        dates.append(current.strftime("%Y-%m-%d"))
-        current += timedelta(days=1)
+    total_days = (end_dt - start_dt).days + 1
+    total_tasks = total_days * len(databases)
 
-    total_tasks = len(dates) * len(databases)
+    job = upload_jobs[job_id]
 
     with jobs_lock:
-        upload_jobs[job_id]["status"] = "running"
-        upload_jobs[job_id]["total"] = total_tasks
-        upload_jobs[job_id]["completed"] = 0
-
-    completed = 0
+        job["status"] = "running"
+        running_job_ids.add(job_id)
+        job["total"] = total_tasks
+        job["completed"] = 0
+        job["progress"] = {}
 
     try:
-        for db_name in databases:
-            opt = EasyDict({
-                "host": HOST,
-                "user": USER,
-                "password": PASSWORD,
-                "dbname": db_name,
-                "crawlerhost": CRAWLERHOST,
-            })
-
-            for date in dates:
-                with jobs_lock:
-                    upload_jobs[job_id]["current_date"] = date
-                    upload_jobs[job_id]["current_db"] = db_name
-
-                try:
-                    pause_duration = random.uniform(3, 15)
-                    time.sleep(pause_duration)
-                    day_upload(date, opt)
-                except Exception as e:
-                    logger.error("上傳失敗 %s %s: %s", db_name, date, e)
-                    with jobs_lock:
-                        upload_jobs[job_id]["errors"].append(
-                            f"{db_name} {date}: {str(e)}"
-                        )
-
-                completed += 1
-                with jobs_lock:
-                    upload_jobs[job_id]["completed"] = completed
+        max_workers = min(len(databases), MAX_DB_WORKERS)
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = [
+                executor.submit(
+                    upload_db_dates, job, db_name, start_dt, total_days
+                )
+                for db_name in databases
+            ]
+
+        for future in futures:
+            future.result()
 
         with jobs_lock:
-            upload_jobs[job_id]["status"] = "completed"
-            upload_jobs[job_id]["finished_at"] = datetime.now().isoformat()
+            job["status"] = "completed"
+            running_job_ids.discard(job_id)
+            job["finished_at"] = datetime.now().isoformat()
         logger.info("上傳任務完成 %s", job_id)
 
     except Exception as e:
         logger.error("上傳任務失敗 %s: %s", job_id, e)
         with jobs_lock:
-            upload_jobs[job_id]["status"] = "failed"
-            upload_jobs[job_id]["error"] = str(e)
-            upload_jobs[job_id]["finished_at"] = datetime.now().isoformat()
+            job["status"] = "failed"
+            running_job_ids.discard(job_id)
+            job["error"] = str(e)
+            job["finished_at"] = datetime.now().isoformat()
 
 
 # Pydantic 請求模型
@@ -202,6 +347,8 @@ async def lifespan(app: FastAPI):
 
     yield
 
+    job_executor.shutdown(wait=False, cancel_futures=True)
+
 
 app = FastAPI(title="台股資料管理介面", lifespan=lifespan)
 
@@ -216,57 +363,56 @@ def create_upload(req: UploadRequest):
     Returns:
         dict: 任務 ID 與初始狀態。
     """
-    # 檢查是否有正在執行的任務
-    with jobs_lock:
-        running_jobs = [
-            j for j in upload_jobs.values() if j["status"] == "running"
-        ]
-        if running_jobs:
-            raise HTTPException(
-                409, "已有上傳任務正在執行中，請等待完成後再提交"
-            )
-
     # 驗證資料庫名稱
-    for db in req.databases:
-        if db not in DB_NAMES:
-            raise HTTPException(400, f"不支援的資料庫: {db}")
+    invalid = set(req.databases) - ALLOWED_DATABASES
+    if invalid:
+        raise HTTPException(
+            400, f"不支援的資料庫: {', '.join(sorted(invalid))}"
+        )
 
     if not req.databases:
         raise HTTPException(400, "請至少選擇一個資料庫")
+    # 重複的資料庫只上傳一次，避免重複寫入
+    databases = list(dict.fromkeys(req.databases))
 
     # 驗證日期格式
     try:
-        start = datetime.strptime(req.start_date, "%Y-%m-%d")
-        end = datetime.strptime(req.end_date, "%Y-%m-%d")
-        if end < start:
-            raise HTTPException(400, "結束日期不能早於起始日期")
+        if not (DATE_PATTERN.fullmatch(req.start_date)
+                and DATE_PATTERN.fullmatch(req.end_date)):
+            raise ValueError
+        start = datetime.fromisoformat(req.start_date)
+        end = datetime.fromisoformat(req.end_date)
     except ValueError:
         raise HTTPException(400, "日期格式錯誤，請使用 YYYY-MM-DD")
+    if end < start:
+        raise HTTPException(400, "結束日期不能早於起始日期")
 
-    job_id = str(uuid.uuid4())[:8]
+    job_id = new_job_id()
 
+    # 請求驗證完成後才取得鎖，檢查執行中任務與建立任務一併完成
     with jobs_lock:
+        if running_job_ids:
+            raise HTTPException(
+                409, "已有上傳任務正在執行中，請等待完成後再提交"
+            )
         upload_jobs[job_id] = {
             "job_id": job_id,
             "status": "pending",
             "start_date": req.start_date,
             "end_date": req.end_date,
-            "databases": req.databases,
+            "databases": databases,
             "total": 0,
             "completed": 0,
-            "current_date": "",
-            "current_db": "",
+            "progress": {},
             "errors": [],
             "created_at": datetime.now().isoformat(),
             "finished_at": None,
         }
+        prune_upload_jobs()
 
-    t = threading.Thread(
-        target=run_upload_job,
-        args=(job_id, req.start_date, req.end_date, req.databases),
-        daemon=True,
+    job_executor.submit(
+        run_upload_job, job_id, req.start_date, req.end_date, databases
     )
-    t.start()
 
     return {"job_id": job_id, "status": "pending"}
 
@@ -275,11 +421,15 @@ def create_upload(req: UploadRequest):
 def list_upload_jobs():
     """列出所有上傳任務。
 
+    於持有 jobs_lock 時以 orjson 序列化，回傳一致的任務快照，
+    並省去 FastAPI 逐欄位的轉換。
+
     Returns:
-        list[dict]: 所有任務的狀態資訊。
+        Response: 所有任務狀態資訊的 JSON 陣列。
     """
     with jobs_lock:
-        return list(upload_jobs.values())
+        body = orjson.dumps(list(upload_jobs.values()))
+    return Response(body, media_type="application/json")
 
 
 @app.get("/api/upload/status/{job_id}")
@@ -290,12 +440,13 @@ def get_upload_status(job_id: str):
         job_id: 任務 ID。
 
     Returns:
-        dict: 任務狀態資訊。
+        Response: 任務狀態資訊的 JSON。
     """
     with jobs_lock:
         if job_id not in upload_jobs:
             raise HTTPException(404, "任務不存在")
-        return upload_jobs[job_id]
+        body = orjson.dumps(upload_jobs[job_id])
+    return Response(body, media_type="application/json")
 
 
 @app.get("/api/schedule")
@@ -319,13 +470,7 @@ def update_schedule(req: ScheduleRequest):
     Returns:
         dict: 更新後的排程時間與訊息。
     """
-    try:
-        time_parts = req.time.split(":")
-        hour = int(time_parts[0])
-        minute = int(time_parts[1])
-        if not (0 <= hour <= 23 and 0 <= minute <= 59):
-            raise ValueError
-    except (ValueError, IndexError):
+    if not TIME_PATTERN.fullmatch(req.time):
         raise HTTPException(400, "時間格式錯誤，請使用 HH:MM")
 
     config = load_config()
@@ -338,13 +483,13 @@ def update_schedule(req: ScheduleRequest):
 
 
 @app.get("/api/databases")
-def list_databases():
+async def list_databases():
     """列出可用的資料庫。
 
     Returns:
-        dict: 包含 databases 欄位的資料庫清單。
+        Response: 包含 databases 欄位的資料庫清單 JSON。
     """
-    return {"databases": DB_NAMES}
+    return Response(DATABASES_JSON, media_type="application/json")
 
 
 def run_quarter_revenue_job(job_id, year, season):
@@ -355,27 +500,32 @@ def run_quarter_revenue_job(job_id, year, season):
         year (int): 民國年。
         season (int): 季度（1-4）。
     """
+    job = upload_jobs[job_id]
+
     with jobs_lock:
-        upload_jobs[job_id]["status"] = "running"
+        job["status"] = "running"
+        running_job_ids.add(job_id)
 
     try:
-        conn = MySQLRouter(HOST, USER, PASSWORD, "TWSE").mysql_conn
-        uploader = QuarterRevenueUploader(conn)
-        record_count = uploader.upload(year, season)
-        conn.close()
+        router = MySQLRouter(HOST, USER, PASSWORD, "TWSE")
+        with router.connection() as conn:
+            uploader = QuarterRevenueUploader(conn)
+            record_count = uploader.upload(year, season)
 
         with jobs_lock:
-            upload_jobs[job_id]["status"] = "completed"
-            upload_jobs[job_id]["record_count"] = record_count
-            upload_jobs[job_id]["finished_at"] = datetime.now().isoformat()
+            job["status"] = "completed"
+            running_job_ids.discard(job_id)
+            job["record_count"] = record_count
+            job["finished_at"] = datetime.now().isoformat()
         logger.info("季度營業收入任務完成 %s", job_id)
 
     except Exception as e:
         logger.error("季度營業收入任務失敗 %s: %s", job_id, e)
         with jobs_lock:
-            upload_jobs[job_id]["status"] = "failed"
-            upload_jobs[job_id]["error"] = str(e)
-            upload_jobs[job_id]["finished_at"] = datetime.now().isoformat()
+            job["status"] = "failed"
+            running_job_ids.discard(job_id)
+            job["error"] = str(e)
+            job["finished_at"] = datetime.now().isoformat()
 
 
 @app.post("/api/quarter-revenue/upload")
@@ -394,19 +544,13 @@ def create_quarter_revenue_upload(req: QuarterRevenueRequest):
     if not (80 <= req.year <= 200):
         raise HTTPException(400, "年份必須為 80-200（民國年）")
 
+    job_id = new_job_id()
+
     with jobs_lock:
-        running_jobs = [
-            j for j in upload_jobs.values()
-            if j["status"] == "running"
-        ]
-        if running_jobs:
+        if running_job_ids:
             raise HTTPException(
                 409, "已有任務正在執行中，請等待完成後再提交"
             )
-
-    job_id = str(uuid.uuid4())[:8]
-
-    with jobs_lock:
         upload_jobs[job_id] = {
             "job_id": job_id,
             "type": "quarter_revenue",
@@ -418,17 +562,47 @@ def create_quarter_revenue_upload(req: QuarterRevenueRequest):
             "created_at": datetime.now().isoformat(),
             "finished_at": None,
         }
+        prune_upload_jobs()
 
-    t = threading.Thread(
-        target=run_quarter_revenue_job,
-        args=(job_id, req.year, req.season),
-        daemon=True,
-    )
-    t.start()
+    job_executor.submit(run_quarter_revenue_job, job_id, req.year, req.season)
 
     return {"job_id": job_id, "status": "pending"}
 
 
+def ensure_quarter_uploaded_table(conn):
+    """確保 QuarterRevenueUploaded 資料表存在且結構相容。
+
+    偵測到舊版結構（缺少 Season 欄位）時會先 DROP 再重建；
+    完成後設定 quarter_table_ready，之後的查詢不再重複檢查。
+
+    Args:
+        conn (sqlalchemy.engine.Connection): MySQL 連線。
+    """
+    # 檢查並移除不相容的舊表結構
+    try:
+        cols = conn.execute(
+            text("DESCRIBE QuarterRevenueUploaded")
+        ).fetchall()
+        col_names = {row[0] for row in cols}
+        if "Season" not in col_names:
+            conn.execute(text("DROP TABLE QuarterRevenueUploaded"))
+            conn.commit()
+    except Exception:
+        pass
+
+    conn.execute(text("""
+        CREATE TABLE IF NOT EXISTS QuarterRevenueUploaded (
+            Year INT,
+            Season INT,
+            UploadedAt DATETIME,
+            RecordCount INT,
+            UNIQUE KEY uq_quarter_uploaded (Year, Season)
+        )
+    """))
+    conn.commit()
+    quarter_table_ready.set()
+
+
 @app.get("/api/quarter-revenue/uploaded")
 def list_uploaded_quarters():
     """列出已上傳的季度營業收入記錄。
@@ -437,39 +611,11 @@ def list_uploaded_quarters():
         dict: 包含 uploaded 欄位的已上傳記錄清單。
     """
     try:
-        conn = MySQLRouter(HOST, USER, PASSWORD, "TWSE").mysql_conn
-
-        # 檢查並移除不相容的舊表結構
-        try:
-            cols = conn.execute(
-                text("DESCRIBE QuarterRevenueUploaded")
-            ).fetchall()
-            col_names = {row[0] for row in cols}
-            if "Season" not in col_names:
-                conn.execute(text("DROP TABLE QuarterRevenueUploaded"))
-                conn.commit()
-        except Exception:
-            pass
-
-        conn.execute(text("""
-            CREATE TABLE IF NOT EXISTS QuarterRevenueUploaded (
-                Year INT,
-                Season INT,
-                UploadedAt DATETIME,
-                RecordCount INT,
-                UNIQUE KEY uq_quarter_uploaded (Year, Season)
-            )
-        """))
-        conn.commit()
-
-        rows = conn.execute(
-            text(
-                "SELECT Year, Season, UploadedAt, RecordCount "
-                "FROM QuarterRevenueUploaded "
-                "ORDER BY Year DESC, Season DESC"
-            )
-        ).fetchall()
-        conn.close()
+        router = MySQLRouter(HOST, USER, PASSWORD, "TWSE")
+        with router.connection() as conn:
+            if not quarter_table_ready.is_set():
+                ensure_quarter_uploaded_table(conn)
+            rows = conn.execute(LIST_UPLOADED_QUARTERS_SQL).fetchall()
 
         uploaded = [
             {
@@ -487,16 +633,38 @@ def list_uploaded_quarters():
         return {"uploaded": []}
 
 
+def load_index_html():
+    """讀取 index.html，檔案未變更時回傳快取內容。
+
+    Returns:
+        tuple[bytes, str] | None: 檔案內容與 ETag，檔案不存在時回傳 None。
+    """
+    try:
+        mtime = INDEX_FILE.stat().st_mtime_ns
+    except FileNotFoundError:
+        return None
+
+    if index_cache.get("mtime") != mtime:
+        body = INDEX_FILE.read_bytes()
+        index_cache.update(
+            mtime=mtime,
+            body=body,
+            etag=f'"{hashlib.sha1(body).hexdigest()}"',
+        )
+    return index_cache["body"], index_cache["etag"]
+
+
 # Serve React 前端靜態檔案
 @app.get("/{full_path:path}")
-async def serve_frontend(full_path: str):
+def serve_frontend(full_path: str, request: Request):
     """Serve React 前端頁面與靜態資源。
 
     Args:
         full_path: 請求路徑。
+        request: HTTP 請求，用於比對 If-None-Match。
 
     Returns:
-        FileResponse: 靜態檔案或 index.html（SPA fallback）。
+        Response: 靜態檔案，或快取的 index.html（SPA fallback）。
     """
     if not STATIC_DIR.exists():
         raise HTTPException(404, "前端頁面尚未建構")
@@ -504,15 +672,18 @@ async def serve_frontend(full_path: str):
     # 防止路徑穿越攻擊
     if full_path:
         file_path = (STATIC_DIR / full_path).resolve()
-        if not str(file_path).startswith(str(STATIC_DIR.resolve())):
+        if not file_path.is_relative_to(STATIC_ROOT):
             raise HTTPException(403, "禁止存取")
         if file_path.is_file():
             return FileResponse(file_path)
 
     # SPA fallback：回傳 index.html
-    index_file = STATIC_DIR / "index.html"
-    if index_file.is_file():
-        return FileResponse(index_file)
+    index = load_index_html()
+    if index is not None:
+        body, etag = index
+        if request.headers.get("if-none-match") == etag:
+            return Response(status_code=304, headers={"ETag": etag})
+        return Response(body, media_type="text/html", headers={"ETag": etag})
 
     raise HTTPException(404, "頁面不存在")
 